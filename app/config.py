@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Literal, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -10,6 +10,18 @@ class Settings(BaseSettings):
     # Database
     db_url: str
     test_db_url: str
+    # Optional async database URL (e.g. sqlite+aiosqlite:///./isha.db or
+    # mysql+asyncmy://...). When set, the isha sutra content GET routes use it
+    # (see app/isha/routers/async_reads.py); the corpus, search, suggest, related
+    # sutras and audio streaming routes keep the sync engine.
+    async_db_url: Optional[str] = None
+
+    # Database connection pool
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_pre_ping: bool = True
+    db_pool_recycle: int = 3600
 
     # JWT Config
     secret_key: str
@@ -21,6 +33,22 @@ class Settings(BaseSettings):
     env: Literal["development", "production"]
     cors_origins: str
 
+    # Isha caches
+    isha_response_cache_max_bytes: int = 16 * 1024 * 1024
+    isha_search_cache_max_bytes: int = 8 * 1024 * 1024
+    # Seconds a worker trusts its copy of the shared content version the caches
+    # and ETags are keyed on; writes through other workers show after this long
+    isha_content_version_ttl: float = 1.0
+    # Answer searches from an in-process inverted index instead of the database
+    isha_search_memory_index: bool = False
+    # Minimum trigram similarity (0 to 1) of the terms a misspelled word matches
+    isha_search_similarity_threshold: float = 0.3
+
+    # Largest audio file accepted by the isha audio uploads
+    isha_audio_max_bytes: int = 100 * 1024 * 1024
+    # Seconds clients may cache streamed audio before revalidating it
+    isha_audio_max_age: int = 24 * 60 * 60
+
     # Configuration for Pydantic Settings
     # The env_file parameter specifies the .env file to load the environment variables from
     model_config = SettingsConfigDict(env_file=".env")
@@ -1,14 +1,93 @@
-from sqlalchemy import create_engine
+import threading
+import time
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.config import settings
 
+
+class PoolStatsMixin:
+    """
+    Count the checkouts of a queue pool that had to wait for a connection
+    because the pool and its overflow were exhausted, and those that timed out.
+
+    Whether a checkout waits is guessed from the pool's state before it, read
+    without the pool's locks, so with concurrent checkouts `waits` and
+    `wait_seconds` are approximate. `timeouts` is exact.
+    """
+
+    def __init__(self, *args, max_overflow: int = 10, **kwargs):
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+        self.max_overflow = max_overflow
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.timeouts = 0
+        self._stats_lock = threading.Lock()
+
+    def connect(self):
+        will_wait = (
+            self.checkedin() == 0
+            and self.max_overflow > -1
+            and self.overflow() >= self.max_overflow
+        )
+        start = time.perf_counter()
+
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            if will_wait:
+                with self._stats_lock:
+                    self.waits += 1
+                    self.wait_seconds += time.perf_counter() - start
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": self.overflow(),
+            "max_overflow": self.max_overflow,
+            "timeout": self.timeout(),
+            "waits": self.waits,
+            "wait_seconds": round(self.wait_seconds, 3),
+            "timeouts": self.timeouts,
+        }
+
+
+class StatsQueuePool(PoolStatsMixin, QueuePool):
+    pass
+
+
+class StatsAsyncAdaptedQueuePool(PoolStatsMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# Connection pool options shared by the sync and async engines
+# pre_ping and recycle avoid handing out connections closed by the database
+# server (e.g. MySQL's wait_timeout) after idle periods
+POOL_OPTIONS = {
+    "pool_size": settings.db_pool_size,
+    "max_overflow": settings.db_max_overflow,
+    "pool_timeout": settings.db_pool_timeout,
+    "pool_pre_ping": settings.db_pool_pre_ping,
+    "pool_recycle": settings.db_pool_recycle,
+}
+
 # Retrieve the database URL from the settings
 SQLALCHEMY_DATABASE_URL = settings.db_url
 
 # Create an SQLAlchemy engine instance
 # The engine is responsible for connecting to the database and managing the connection pool
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL, poolclass=StatsQueuePool, **POOL_OPTIONS
+)
 
 # Create a configured "Session" class
 # SessionLocal will be a factory for new Session objects
@@ -16,6 +95,24 @@ engine = create_engine(SQLALCHEMY_DATABASE_URL)
 # autoflush=False prevents automatic flushing of the session (committing changes to the database)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Optionally create an async engine and session factory
+# They are only used by the isha sutra content GET routes, when an async database
+# URL is configured, so a single worker can serve many concurrent reads without
+# being limited by the threadpool. The other isha read routes use the sync engine.
+# The async driver (aiosqlite or asyncmy) must be installed separately.
+async_engine = (
+    create_async_engine(
+        settings.async_db_url, poolclass=StatsAsyncAdaptedQueuePool, **POOL_OPTIONS
+    )
+    if settings.async_db_url
+    else None
+)
+AsyncSessionLocal = (
+    async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    if async_engine
+    else None
+)
+
 # Create a base class for our declarative models to inherit from
 # This will allow SQLAlchemy to keep track of our models and their mappings to the database tables
 Base = declarative_base()
@@ -30,3 +127,10 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency to get an async session object
+# Only usable when an async database URL is configured
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
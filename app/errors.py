@@ -72,11 +72,11 @@ def forbidden_error_response(detail: Optional[str] = None) -> None:
     error_response(status_code=status.HTTP_403_FORBIDDEN, detail=message)
 
 
-def not_found_error_response():
+def not_found_error_response(detail: Optional[str] = None) -> None:
     """
     Helper function to raise a 404 Not Found error response.
     """
-    message = "The requested resource was not found."
+    message = detail or "The requested resource was not found."
     error_response(status_code=status.HTTP_404_NOT_FOUND, detail=message)
 
 
@@ -99,6 +99,14 @@ def conflict_error_response(detail: Optional[str] = None) -> None:
     error_response(status_code=status.HTTP_409_CONFLICT, detail=message)
 
 
+def payload_too_large_error_response(detail: Optional[str] = None) -> None:
+    """
+    Helper function to raise a 413 Request Entity Too Large error response.
+    """
+    message = detail or "The request body is larger than the server accepts."
+    error_response(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=message)
+
+
 def server_error_response(
     error: Annotated[
         Any,
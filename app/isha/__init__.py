@@ -1,6 +1,9 @@
 # Create database tables
 from app.database import engine
 
-from . import models
+from . import migrations, models
 
 models.Base.metadata.create_all(bind=engine)
+
+# Upgrade tables created by older versions of the models
+migrations.upgrade(engine)
@@ -0,0 +1,338 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable, Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.isha import models
+
+
+@dataclass(frozen=True)
+class CachedSutra:
+    id: int
+    number: int
+    text: str
+
+
+class SutraMap:
+    """
+    In-process map of sutra number to sutra id and text.
+
+    Sutras are few and rarely edited, so the whole table is held in memory and
+    looked up instead of querying `isha_sutras` on every request. The map is
+    loaded lazily (or at startup with `load`) and keyed on the shared content
+    version: it is reloaded once the version changed, e.g. after a write
+    through another worker. A number missing from the map triggers a reload too.
+    """
+
+    def __init__(self):
+        # (content version, map) pair, replaced as a whole on every load
+        self._loaded: Optional[tuple[int, dict[int, CachedSutra]]] = None
+
+    def load(self, db: Session) -> dict[int, CachedSutra]:
+        # Read the version before loading, see `CorpusSnapshots.get`
+        version = content_version.sync(db)
+        rows = db.query(models.Sutra.id, models.Sutra.number, models.Sutra.text)
+        sutras = {
+            number: CachedSutra(id=id, number=number, text=text)
+            for id, number, text in rows
+        }
+        self._loaded = (version, sutras)
+        return sutras
+
+    def invalidate(self) -> None:
+        self._loaded = None
+
+    def peek(self, sutra_no: int) -> Optional[CachedSutra]:
+        """
+        Return the sutra if it is in the map loaded at the last synced content
+        version, without any database access.
+        """
+        loaded = self._loaded
+
+        if loaded is None or loaded[0] != content_version.value:
+            return None
+
+        return loaded[1].get(sutra_no)
+
+    def get(self, sutra_no: int, db: Session) -> Optional[CachedSutra]:
+        version = content_version.sync(db)
+        loaded = self._loaded
+
+        if loaded is None or loaded[0] != version or sutra_no not in loaded[1]:
+            return self.load(db).get(sutra_no)
+
+        return loaded[1].get(sutra_no)
+
+
+class ContentVersion:
+    """
+    Version of the isha content, globally and per sutra, shared by all worker
+    processes through the `isha_corpus_version` and `isha_sutra_versions` tables.
+
+    Every handler that writes a sutra or one of its children calls `bump` before
+    committing, so the version changes in the same transaction as the content.
+    Caches built from the database detect that they are stale by comparing the
+    version they were built at with the current one, and clients revalidate
+    responses with an ETag.
+
+    Each process keeps a copy of the versions, re-read by `sync` when it is older
+    than `isha_content_version_ttl` seconds or was expired by a write through
+    this process. Writes through other workers are seen after at most that long.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._started = time.time()
+        # (version, modification time) pairs, replaced as a whole on every sync
+        self._current: Optional[tuple[int, float]] = None
+        self._sutras: dict[int, tuple[int, float]] = {}
+        # Monotonic time of the last sync
+        self._synced: Optional[float] = None
+
+    @property
+    def value(self) -> int:
+        """The version at the last `sync`, or -1 before the first one."""
+        current = self._current
+        return current[0] if current else -1
+
+    @property
+    def stale(self) -> bool:
+        synced = self._synced
+        return synced is None or time.monotonic() - synced >= self.ttl
+
+    def sync(self, db: Session) -> int:
+        """
+        Re-read the versions from the database if this process's copy is stale.
+
+        Returns:
+            int: The current version.
+        """
+        if not self.stale:
+            return self.value
+
+        row = db.query(
+            models.CorpusVersion.version, models.CorpusVersion.modified
+        ).first()
+        current = (row.version, row.modified) if row else (0, 0.0)
+
+        sutras = self._sutras
+        if self._current is None or self._current[0] != current[0]:
+            rows = db.query(
+                models.SutraVersion.sutra_no,
+                models.SutraVersion.version,
+                models.SutraVersion.modified,
+            )
+            sutras = {
+                sutra_no: (version, modified) for sutra_no, version, modified in rows
+            }
+
+        with self._lock:
+            self._current = current
+            self._sutras = sutras
+            self._synced = time.monotonic()
+
+        return current[0]
+
+    def bump(self, db: Session, *sutra_nos: int) -> int:
+        """
+        Increment the version and record it as the version of `sutra_nos`, in the
+        transaction of `db`. Pass both numbers when a sutra is renumbered.
+
+        The row of `isha_corpus_version` stays locked until the transaction ends,
+        so concurrent writes are serialized and never miss each other's versions.
+        """
+        now = time.time()
+
+        bumped = db.execute(
+            update(models.CorpusVersion).values(
+                version=models.CorpusVersion.version + 1, modified=now
+            )
+        )
+        if not bumped.rowcount:
+            db.execute(
+                insert(models.CorpusVersion).values(id=1, version=1, modified=now)
+            )
+
+        version = db.scalar(select(models.CorpusVersion.version))
+
+        for sutra_no in dict.fromkeys(sutra_nos):
+            updated = db.execute(
+                update(models.SutraVersion)
+                .where(models.SutraVersion.sutra_no == sutra_no)
+                .values(version=version, modified=now)
+            )
+            if not updated.rowcount:
+                db.execute(
+                    insert(models.SutraVersion).values(
+                        sutra_no=sutra_no, version=version, modified=now
+                    )
+                )
+
+        return version
+
+    def expire(self) -> None:
+        """Re-read the versions on the next `sync`, e.g. after a write commits."""
+        self._synced = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._current = None
+            self._sutras = {}
+            self._synced = None
+
+    def changed_since(self, version: int) -> set[int]:
+        """Numbers of the sutras written after `version`."""
+        with self._lock:
+            return {
+                sutra_no
+                for sutra_no, (value, _) in self._sutras.items()
+                if value > version
+            }
+
+    def get(self, sutra_no: Optional[int] = None) -> tuple[str, float]:
+        """
+        Return the strong ETag and last modification time of the whole corpus,
+        or of a single sutra when `sutra_no` is given, as of the last `sync`.
+        """
+        if sutra_no is None:
+            value, modified = self._current or (-1, 0.0)
+        else:
+            # Sutras never written since the versions were introduced
+            value, modified = self._sutras.get(sutra_no, (0, 0.0))
+
+        return f'"{value}"', modified or self._started
+
+
+class LRUCache:
+    """
+    Thread-safe least recently used cache bounded by the total size of its values.
+
+    Values are stored with a caller supplied size, e.g. the length of a
+    serialized response, and the least recently used entries are evicted once
+    the total exceeds `max_bytes`.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._size = 0
+
+    def get(
+        self, key: Hashable, is_valid: Optional[Callable[[Any], bool]] = None
+    ) -> Optional[Any]:
+        """
+        Return the value cached under `key`, or None. Values rejected by
+        `is_valid` are removed and count as a miss.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None and is_valid and not is_valid(entry[0]):
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, size: int) -> None:
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, size)
+            self._size += size
+
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Remove every entry whose key satisfies `predicate`."""
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+
+        if entry is not None:
+            self._size -= entry[1]
+
+
+class ResponseCache(LRUCache):
+    """
+    Serialized GET responses keyed by (route, sutra_no, lang, phil, mode).
+
+    Entries hold the ETag of the content version they were built from and are
+    only served while it is current, so a response built concurrently with a
+    write, or before a write through another worker, is never served after it.
+    Routes that depend on every sutra use `None` as sutra_no.
+    """
+
+    def get_response(self, key: tuple, etag: str) -> Optional[bytes]:
+        entry = self.get(key, is_valid=lambda entry: entry[0] == etag)
+
+        return entry[1] if entry else None
+
+    def set_response(self, key: tuple, etag: str, body: bytes) -> None:
+        self.set(key, (etag, body), len(body))
+
+    def invalidate_sutras(self, *sutra_nos: int) -> None:
+        """
+        Drop the responses of the given sutras and of corpus-wide routes, which
+        are stale anyway, to free their memory.
+        """
+        self.invalidate(lambda key: key[1] is None or key[1] in sutra_nos)
+
+
+class SearchCache(LRUCache):
+    """
+    Serialized search results keyed by the normalized query words, similarity,
+    filters and page.
+
+    Entries hold the shared content version they were built at and are only
+    served while it is current, so any content write, through any worker,
+    invalidates the whole cache.
+    """
+
+    def get_results(self, key: tuple, version: int) -> Optional[bytes]:
+        entry = self.get(key, is_valid=lambda entry: entry[0] == version)
+
+        return entry[1] if entry else None
+
+    def set_results(self, key: tuple, version: int, body: bytes) -> None:
+        self.set(key, (version, body), len(body))
+
+
+sutra_map = SutraMap()
+content_version = ContentVersion(settings.isha_content_version_ttl)
+response_cache = ResponseCache(settings.isha_response_cache_max_bytes)
+search_cache = SearchCache(settings.isha_search_cache_max_bytes)
@@ -0,0 +1,142 @@
+import hashlib
+import threading
+from typing import Optional
+
+import orjson
+from sqlalchemy.orm import Session
+
+from app.isha import models
+from app.isha.cache import content_version
+from app.utils import Language, Philosophy
+
+
+def build_corpus(
+    db: Session, lang: Optional[Language] = None, phil: Optional[Philosophy] = None
+) -> list[dict]:
+    """
+    Load every sutra with its children, optionally limited to one language and
+    philosophy, using one query per table.
+    """
+    sutras = {
+        id: {
+            "id": id,
+            "number": number,
+            "text": text,
+            "transliterations": [],
+            "meanings": [],
+            "interpretations": [],
+            "bhashyams": [],
+            "audios": [],
+        }
+        for id, number, text in db.query(
+            models.Sutra.id, models.Sutra.number, models.Sutra.text
+        ).order_by(models.Sutra.number)
+    }
+
+    def add_children(key: str, model, *columns, filter_phil: bool = False):
+        query = db.query(model.sutra_id, *columns).order_by(model.id)
+
+        if lang and hasattr(model, "language"):
+            query = query.filter(model.language == lang)
+        if phil and filter_phil:
+            query = query.filter(model.philosophy == phil)
+
+        for sutra_id, *values in query:
+            if sutra_id in sutras:
+                sutras[sutra_id][key].append(
+                    {column.key: value for column, value in zip(columns, values)}
+                )
+
+    add_children(
+        "transliterations",
+        models.Transliteration,
+        models.Transliteration.id,
+        models.Transliteration.language,
+        models.Transliteration.text,
+    )
+    add_children(
+        "meanings",
+        models.Meaning,
+        models.Meaning.id,
+        models.Meaning.language,
+        models.Meaning.text,
+    )
+    add_children(
+        "interpretations",
+        models.Interpretation,
+        models.Interpretation.id,
+        models.Interpretation.language,
+        models.Interpretation.text,
+        models.Interpretation.philosophy,
+        filter_phil=True,
+    )
+    add_children(
+        "bhashyams",
+        models.Bhashyam,
+        models.Bhashyam.language,
+        models.Bhashyam.text,
+        models.Bhashyam.philosophy,
+        models.Bhashyam.sutra_id,
+        filter_phil=True,
+    )
+    add_children(
+        "audios",
+        models.Audio,
+        models.Audio.file_path,
+        models.Audio.sha256,
+        models.Audio.mode,
+    )
+
+    return list(sutras.values())
+
+
+def serialize_corpus(sutras: list[dict]) -> bytes:
+    """
+    Serialize a corpus to JSON. The version is a hash of the content, so every
+    process serving the same content reports the same version.
+    """
+    body = orjson.dumps(sutras)
+    version = hashlib.sha256(body).hexdigest()[:16]
+
+    return b'{"version":"%s","sutras":%s}' % (version.encode(), body)
+
+
+class CorpusSnapshots:
+    """
+    Serialized corpus snapshots per language and philosophy.
+
+    A snapshot is built on first request and served as is until a write bumps
+    the content version.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots: dict[tuple, tuple[int, bytes]] = {}
+
+    def get(
+        self,
+        db: Session,
+        lang: Optional[Language] = None,
+        phil: Optional[Philosophy] = None,
+    ) -> bytes:
+        key = (lang, phil)
+        # Read the version before loading, so a write committed while building
+        # leaves the snapshot stale instead of wrongly current
+        version = content_version.sync(db)
+
+        cached = self._snapshots.get(key)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        with self._lock:
+            cached = self._snapshots.get(key)
+            if cached and cached[0] == version:
+                return cached[1]
+
+            snapshot = serialize_corpus(build_corpus(db, lang, phil))
+            self._snapshots[key] = (version, snapshot)
+
+        return snapshot
+
+
+corpus_snapshots = CorpusSnapshots()
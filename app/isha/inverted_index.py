@@ -0,0 +1,312 @@
+import math
+import threading
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.isha import models
+
+# BM25 parameters, the defaults of SQLite's FTS5
+K1 = 1.2
+B = 0.75
+
+
+# Document fields the index keeps the documents of each value of
+ATTRIBUTES = ("content_type", "language", "philosophy")
+
+
+@dataclass(frozen=True)
+class SearchFilters:
+    """Restricts a search to some documents. Fields left to None match any."""
+
+    content_type: str | None = None
+    language: str | None = None
+    philosophy: str | None = None
+    sutra_from: int | None = None
+    sutra_to: int | None = None
+
+
+@dataclass(frozen=True)
+class IndexedDocument:
+    id: int
+    sutra_no: int
+    content_type: str
+    language: str | None
+    philosophy: str | None
+    offset: int
+    text: str
+
+
+class InvertedIndex:
+    """
+    In-process inverted index of the search documents.
+
+    Maps every term to its postings: the documents containing it with the
+    character offsets of its occurrences. Documents carry their content type,
+    sutra number, language and philosophy, so a search is answered without any
+    database access. The documents of each sutra, content type, language and
+    philosophy are kept too, so a filtered search only looks at those documents.
+
+    The index is loaded from `isha_search_documents` (at startup or on first
+    search). Like the other caches, it is per process and keyed on the shared
+    content version: the documents of the sutras written since the version it
+    was loaded at are reloaded before searching (see `app.isha.search`).
+    """
+
+    def __init__(self, tokenize: Callable[[str], list[tuple[str, int, int]]]):
+        self._tokenize = tokenize
+        self._lock = threading.Lock()
+        # Content version the index is up to date with, None until loaded
+        self.version: Optional[int] = None
+        self._next_id = 1
+        self._documents: dict[int, IndexedDocument] = {}
+        self._sutras: dict[int, list[int]] = {}
+        self._attributes: dict[tuple[str, str], set[int]] = {}
+        self._lengths: dict[int, int] = {}
+        self._total_length = 0
+        self._postings: dict[str, dict[int, list[int]]] = {}
+        self._terms: list[str] = []
+
+    def load(
+        self, db: Session, version: int, sutra_nos: Optional[Iterable[int]] = None
+    ) -> int:
+        """
+        Build the index from the search documents table, or only replace the
+        documents of `sutra_nos` when given.
+
+        Parameters:
+            db (Session): Database session.
+            version (int): Content version the documents are read at.
+            sutra_nos (Iterable[int], optional): Numbers of the sutras to reload.
+
+        Returns:
+            int: Number of documents indexed.
+        """
+        query = db.query(
+            models.SearchDocument.sutra_no,
+            models.SearchDocument.content_type,
+            models.SearchDocument.language,
+            models.SearchDocument.philosophy,
+            models.SearchDocument.offset,
+            models.SearchDocument.text,
+        )
+        if sutra_nos is not None:
+            sutra_nos = set(sutra_nos)
+            query = query.filter(models.SearchDocument.sutra_no.in_(sutra_nos))
+
+        rows = query.all()
+
+        with self._lock:
+            if sutra_nos is None:
+                self._clear()
+            else:
+                for sutra_no in sutra_nos:
+                    for id in self._sutras.pop(sutra_no, []):
+                        self._remove(id)
+
+            for row in rows:
+                self._add(row._asdict())
+            self.version = version
+
+        return len(rows)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+            self.version = None
+
+    def search(
+        self,
+        words: Iterable[tuple[str, ...]],
+        limit: Optional[int] = None,
+        offset: int = 0,
+        filters: Optional[SearchFilters] = None,
+    ) -> list[tuple[IndexedDocument, float]]:
+        """
+        Find the documents matching every word, with one of its alternative terms
+        as a word or a word prefix, ranked by BM25 like the SQLite full-text
+        search. Only the documents passing `filters` are scored.
+
+        Returns:
+            list[tuple[IndexedDocument, float]]: Documents with their scores, best
+                first.
+        """
+        with self._lock:
+            candidates = self._filtered_ids(filters) if filters else None
+            frequencies = []
+
+            for terms in words:
+                matches, document_count = self._prefix_matches(terms, candidates)
+                if not matches:
+                    return []
+                frequencies.append((matches, document_count))
+
+            ids = set(frequencies[0][0]).intersection(
+                *(matches for matches, _ in frequencies[1:])
+            )
+            count = len(self._documents)
+            average_length = self._total_length / count
+
+            results = [
+                (
+                    self._documents[id],
+                    sum(
+                        bm25(
+                            matches[id],
+                            document_count,
+                            count,
+                            self._lengths[id] / average_length,
+                        )
+                        for matches, document_count in frequencies
+                    ),
+                )
+                for id in ids
+            ]
+
+        results.sort(key=lambda result: (-result[1], result[0].id))
+
+        return results[offset : None if limit is None else offset + limit]
+
+    def _filtered_ids(self, filters: SearchFilters) -> Optional[set[int]]:
+        """The documents passing `filters`, or None when they restrict nothing."""
+        candidates = None
+
+        for field in ATTRIBUTES:
+            value = getattr(filters, field)
+            if value is not None:
+                ids = self._attributes.get((field, value), set())
+                candidates = ids if candidates is None else candidates & ids
+
+        if filters.sutra_from is not None or filters.sutra_to is not None:
+            lowest = -math.inf if filters.sutra_from is None else filters.sutra_from
+            highest = math.inf if filters.sutra_to is None else filters.sutra_to
+            ids = {
+                id
+                for sutra_no, sutra_ids in self._sutras.items()
+                if lowest <= sutra_no <= highest
+                for id in sutra_ids
+            }
+            candidates = ids if candidates is None else candidates & ids
+
+        return candidates
+
+    def _prefix_matches(
+        self, prefixes: tuple[str, ...], candidates: Optional[set[int]] = None
+    ) -> tuple[dict[int, int], int]:
+        """
+        Count the occurrences of terms starting with one of `prefixes` per document,
+        in the `candidates` documents only when given.
+
+        Returns:
+            tuple[dict[int, int], int]: The counts, and the number of documents of
+                the whole index containing one of the terms, for BM25.
+        """
+        frequencies: dict[int, int] = {}
+        terms = set()
+
+        for prefix in prefixes:
+            position = bisect_left(self._terms, prefix)
+            while position < len(self._terms) and self._terms[position].startswith(
+                prefix
+            ):
+                terms.add(self._terms[position])
+                position += 1
+
+        postings = [self._postings[term] for term in terms]
+
+        for term_postings in postings:
+            if candidates is None:
+                matches = term_postings.items()
+            elif len(candidates) < len(term_postings):
+                # Look the few candidates up rather than scan the postings
+                matches = (
+                    (id, term_postings[id]) for id in candidates if id in term_postings
+                )
+            else:
+                matches = (
+                    (id, offsets)
+                    for id, offsets in term_postings.items()
+                    if id in candidates
+                )
+
+            for id, offsets in matches:
+                frequencies[id] = frequencies.get(id, 0) + len(offsets)
+
+        if candidates is None:
+            document_count = len(frequencies)
+        elif len(postings) == 1:
+            document_count = len(postings[0])
+        else:
+            document_count = len(set().union(*postings))
+
+        return frequencies, document_count
+
+    def _clear(self) -> None:
+        self._documents = {}
+        self._sutras = {}
+        self._attributes = {}
+        self._lengths = {}
+        self._total_length = 0
+        self._postings = {}
+        self._terms = []
+
+    def _add(self, document: dict) -> None:
+        id = self._next_id
+        self._next_id += 1
+
+        self._documents[id] = IndexedDocument(
+            id=id,
+            sutra_no=document["sutra_no"],
+            content_type=document["content_type"],
+            language=document["language"],
+            philosophy=document["philosophy"],
+            offset=document["offset"],
+            text=document["text"],
+        )
+        self._sutras.setdefault(document["sutra_no"], []).append(id)
+        for field in ATTRIBUTES:
+            self._attributes.setdefault((field, document[field]), set()).add(id)
+
+        tokens = self._tokenize(document["text"])
+        self._lengths[id] = len(tokens)
+        self._total_length += len(tokens)
+
+        for term, offset, _ in tokens:
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._terms, term)
+            postings.setdefault(id, []).append(offset)
+
+    def _remove(self, id: int) -> None:
+        document = self._documents.pop(id)
+        self._total_length -= self._lengths.pop(id)
+        for field in ATTRIBUTES:
+            self._attributes[(field, getattr(document, field))].discard(id)
+
+        for term, _, _ in self._tokenize(document.text):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+
+            postings.pop(id, None)
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect_left(self._terms, term)]
+
+
+def bm25(frequency: int, document_count: int, count: int, relative_length: float):
+    """
+    BM25 weight of a term in a document.
+
+    Parameters:
+        frequency (int): Occurrences of the term in the document.
+        document_count (int): Number of documents containing the term.
+        count (int): Number of documents in the index.
+        relative_length (float): Document length divided by the average length.
+    """
+    idf = math.log((count - document_count + 0.5) / (document_count + 0.5) + 1)
+
+    return idf * frequency * (K1 + 1) / (frequency + K1 * (1 - B + B * relative_length))
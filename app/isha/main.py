@@ -1,11 +1,13 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
-from .routers import audio, interpretations, meanings, sutras, transliterations, search, bhashyam
+from .routers import audio, interpretations, meanings, sutras, transliterations, search, bhashyam, corpus, async_reads
 
 # Initialize FastAPI app
 isha = FastAPI(
     title="Ishavasyopanishad",
+    default_response_class=ORJSONResponse,
     docs_url=None if settings.env == "production" else "/docs",
     redoc_url=None if settings.env == "production" else "/redoc",
 )
@@ -21,6 +23,10 @@ isha = FastAPI(
 
 # Include routers
 
+# The async read handlers must be registered first to take precedence
+if settings.async_db_url:
+    isha.include_router(async_reads.router)
+
 isha.include_router(sutras.router)
 isha.include_router(meanings.router)
 isha.include_router(transliterations.router)
@@ -28,3 +34,4 @@ isha.include_router(interpretations.router)
 isha.include_router(audio.router)
 isha.include_router(search.router)
 isha.include_router(bhashyam.router)
+isha.include_router(corpus.router)
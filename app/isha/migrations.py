@@ -0,0 +1,158 @@
+import logging
+
+from sqlalchemy import Engine, Index, inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateColumn
+
+from app.isha import models, search
+
+logger = logging.getLogger(__name__)
+
+
+def add_missing_columns(engine: Engine) -> list[str]:
+    """
+    Add the nullable columns declared on the isha models that are missing from
+    the database, e.g. `isha_audio.sha256` on databases created before it.
+
+    Like indexes, columns added to a model are never created by `create_all`.
+    Columns that cannot be null would need a value for the existing rows, so
+    they are skipped with an error log. The search documents are derived data
+    and are recreated by `upgrade_search_index` instead.
+
+    Returns:
+        list[str]: Names of the columns that were added, as "table.column".
+    """
+    inspector = inspect(engine)
+    preparer = engine.dialect.identifier_preparer
+    added = []
+
+    for table in models.Base.metadata.sorted_tables:
+        if (
+            not table.name.startswith("isha_")
+            or table is models.SearchDocument.__table__
+            or not inspector.has_table(table.name)
+        ):
+            continue
+
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+
+        for column in table.columns:
+            if column.name in existing:
+                continue
+
+            if not column.nullable:
+                logger.error(
+                    f"Could not add column {column.name} to {table.name}: "
+                    "it cannot be null"
+                )
+                continue
+
+            ddl = CreateColumn(column).compile(dialect=engine.dialect)
+            with engine.begin() as conn:
+                conn.execute(
+                    text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {ddl}")
+                )
+
+            logger.info(f"Added column {column.name} to {table.name}")
+            added.append(f"{table.name}.{column.name}")
+
+    return added
+
+
+def index_applies(index: Index, dialect_name: str) -> bool:
+    """Whether an index is created on the given database, see `Index.ddl_if`."""
+    ddl_if = index._ddl_if
+    if ddl_if is None or ddl_if.dialect is None:
+        return True
+
+    dialects = [ddl_if.dialect] if isinstance(ddl_if.dialect, str) else ddl_if.dialect
+    return dialect_name in dialects
+
+
+def create_missing_indexes(engine: Engine) -> list[str]:
+    """
+    Create indexes declared on the isha models that are missing from the database.
+
+    `Base.metadata.create_all` only creates missing tables, so databases created
+    before an index was added to a model (e.g. an existing `isha.db` or MySQL
+    deployment) never receive it. This is safe to run on every startup.
+
+    A unique index cannot be created while the table holds duplicate rows; such
+    indexes are skipped with an error log so the duplicates can be cleaned up.
+
+    Returns:
+        list[str]: Names of the indexes that were created.
+    """
+    inspector = inspect(engine)
+    created = []
+
+    for table in models.Base.metadata.sorted_tables:
+        if not table.name.startswith("isha_") or not inspector.has_table(table.name):
+            continue
+
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+
+        for index in table.indexes:
+            # Indexes on missing columns wait for `add_missing_columns`
+            if index.name in existing or not set(index.columns.keys()) <= columns:
+                continue
+
+            # Indexes of other databases, e.g. MySQL's full-text index
+            if not index_applies(index, engine.dialect.name):
+                continue
+
+            try:
+                index.create(bind=engine)
+            except IntegrityError:
+                logger.error(
+                    f"Could not create unique index {index.name}: "
+                    f"{table.name} contains duplicate rows"
+                )
+                continue
+
+            logger.info(f"Created index {index.name} on {table.name}")
+            created.append(index.name)
+
+    return created
+
+
+def upgrade_search_index(engine: Engine) -> bool:
+    """
+    Rebuild the search documents when they were built with an older term format,
+    or were never built (e.g. a database created before search was indexed).
+
+    The documents are derived from the content tables, so a documents table
+    whose columns differ from the model is dropped and recreated instead of
+    being altered.
+
+    Returns:
+        bool: Whether the search index was rebuilt.
+    """
+    table = models.SearchDocument.__table__
+    columns = {column["name"] for column in inspect(engine).get_columns(table.name)}
+    recreated = columns != set(table.columns.keys())
+
+    if recreated:
+        table.drop(bind=engine)
+        table.create(bind=engine)
+
+    with Session(engine) as db:
+        version = db.query(models.SearchIndexVersion.version).scalar()
+        if version == search.INDEX_VERSION and not recreated:
+            return False
+
+        count = search.rebuild_index(db)
+        db.commit()
+
+    logger.info(f"Rebuilt the isha search index with {count} documents")
+    return True
+
+
+def upgrade(engine: Engine) -> None:
+    """Bring an existing database schema up to date with the isha models."""
+    # Columns first, as new indexes may cover them
+    add_missing_columns(engine)
+    create_missing_indexes(engine)
+    upgrade_search_index(engine)
@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, Integer, String, Text
+from sqlalchemy import DDL, Float, ForeignKey, Index, Integer, String, Text, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -29,6 +29,14 @@ class Sutra(Base):
 
 class Transliteration(Base):
     __tablename__ = "isha_transliterations"
+    __table_args__ = (
+        Index(
+            "ix_isha_transliterations_sutra_id_language",
+            "sutra_id",
+            "language",
+            unique=True,
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     language: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -42,6 +50,14 @@ class Transliteration(Base):
 
 class Meaning(Base):
     __tablename__ = "isha_meanings"
+    __table_args__ = (
+        Index(
+            "ix_isha_meanings_sutra_id_language",
+            "sutra_id",
+            "language",
+            unique=True,
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     language: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -55,6 +71,15 @@ class Meaning(Base):
 
 class Interpretation(Base):
     __tablename__ = "isha_interpretations"
+    __table_args__ = (
+        Index(
+            "ix_isha_interpretations_sutra_id_language_philosophy",
+            "sutra_id",
+            "language",
+            "philosophy",
+            unique=True,
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     language: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -71,9 +96,14 @@ class Interpretation(Base):
 
 class Audio(Base):
     __tablename__ = "isha_audio"
+    __table_args__ = (
+        Index("ix_isha_audio_sutra_id_mode", "sutra_id", "mode", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     file_path: Mapped[str] = mapped_column(String(500))  # Relative to static directory
+    # SHA-256 of the file, which it is stored under. Null for older uploads.
+    sha256: Mapped[str | None] = mapped_column(String(64), index=True)
     mode: Mapped[str] = mapped_column(String(10))
     sutra_id: Mapped[int] = mapped_column(
         ForeignKey("isha_sutras.id", ondelete="CASCADE")
@@ -85,6 +115,15 @@ class Audio(Base):
 
 class Bhashyam(Base):
     __tablename__ = "isha_bhashyams"
+    __table_args__ = (
+        Index(
+            "ix_isha_bhashyams_sutra_id_language_philosophy",
+            "sutra_id",
+            "language",
+            "philosophy",
+            unique=True,
+        ),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     sutra_id: Mapped[int] = mapped_column(Integer, ForeignKey("isha_sutras.id", ondelete="CASCADE"))
     language: Mapped[str] = mapped_column(String(50), nullable=False)
@@ -94,6 +133,111 @@ class Bhashyam(Base):
 
 
 
+class SearchDocument(Base):
+    """
+    A searchable text of a sutra: the sutra itself, a meaning, a transliteration,
+    an interpretation or a passage of a bhashyam. Derived from the content
+    tables by `app.isha.search`, which rebuilds a sutra's documents on every
+    write to its content.
+
+    `terms` holds the text's search terms separated by spaces and carries the
+    full-text index: FTS5 on SQLite, FULLTEXT on MySQL.
+    """
+
+    __tablename__ = "isha_search_documents"
+    __table_args__ = (
+        Index(
+            "ix_isha_search_documents_terms", "terms", mysql_prefix="FULLTEXT"
+        ).ddl_if(dialect="mysql"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    sutra_no: Mapped[int] = mapped_column(Integer, index=True)
+    content_type: Mapped[str] = mapped_column(String(20))
+    language: Mapped[str | None] = mapped_column(String(50))
+    philosophy: Mapped[str | None] = mapped_column(String(50))
+    # Offset of the text in its content, for the passages of a bhashyam
+    offset: Mapped[int] = mapped_column(Integer, default=0)
+    text: Mapped[str] = mapped_column(Text, nullable=False)
+    terms: Mapped[str] = mapped_column(Text, nullable=False)
+
+
+class SearchIndexVersion(Base):
+    """Version of the term format the search documents were built with."""
+
+    __tablename__ = "isha_search_index_version"
+
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+
+class CorpusVersion(Base):
+    """
+    Version of the whole isha content, incremented by every write to a sutra or
+    one of its children, in the same transaction (see `app.isha.cache`).
+
+    Holds a single row, inserted when the table is created. Shared by all worker
+    processes, unlike their in-memory caches, which are keyed on it.
+    """
+
+    __tablename__ = "isha_corpus_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Unix time of the last write
+    modified: Mapped[float] = mapped_column(Float, nullable=False)
+
+
+class SutraVersion(Base):
+    """
+    Content version at the last write to a sutra or one of its children, by
+    sutra number. Rows are kept when a sutra is deleted or renumbered, so the
+    number's version still changes.
+    """
+
+    __tablename__ = "isha_sutra_versions"
+
+    sutra_no: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    modified: Mapped[float] = mapped_column(Float, nullable=False)
+
+
+event.listen(
+    CorpusVersion.__table__,
+    "after_create",
+    DDL(
+        "INSERT INTO isha_corpus_version (id, version, modified) VALUES (1, 0, 0)"
+    ),
+)
+
+
+# SQLite full-text index over the search terms, kept in sync by triggers
+# The terms are tokenized in Python, so the ascii tokenizer only splits on spaces
+for statement in [
+    "CREATE VIRTUAL TABLE isha_search_fts USING fts5("
+    "terms, content='isha_search_documents', content_rowid='id', tokenize='ascii')",
+    "CREATE TRIGGER isha_search_documents_ai AFTER INSERT ON isha_search_documents "
+    "BEGIN INSERT INTO isha_search_fts (rowid, terms) VALUES (new.id, new.terms); END",
+    "CREATE TRIGGER isha_search_documents_ad AFTER DELETE ON isha_search_documents "
+    "BEGIN INSERT INTO isha_search_fts (isha_search_fts, rowid, terms) "
+    "VALUES ('delete', old.id, old.terms); END",
+    "CREATE TRIGGER isha_search_documents_au AFTER UPDATE ON isha_search_documents "
+    "BEGIN INSERT INTO isha_search_fts (isha_search_fts, rowid, terms) "
+    "VALUES ('delete', old.id, old.terms); "
+    "INSERT INTO isha_search_fts (rowid, terms) VALUES (new.id, new.terms); END",
+]:
+    event.listen(
+        SearchDocument.__table__,
+        "after_create",
+        DDL(statement).execute_if(dialect="sqlite"),
+    )
+
+event.listen(
+    SearchDocument.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS isha_search_fts").execute_if(dialect="sqlite"),
+)
+
+
 # class Bhashyam(Base):
 #     __tablename__ = "isha_bhashyams"
 
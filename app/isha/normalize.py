@@ -0,0 +1,86 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+# Devanagari, Telugu and Kannada share the layout of their Unicode blocks, so
+# the same folding applies to each of them at its own base
+SCRIPT_BASES = (0x0900, 0x0C00, 0x0C80)
+
+# Offsets in a block
+CANDRABINDU = 0x01
+ANUSVARA = 0x02
+VISARGA = 0x03
+NUKTA = 0x3C
+AVAGRAHA = 0x3D
+VIRAMA = 0x4D
+MA = 0x2E
+NASALS = (0x19, 0x1E, 0x23, 0x28, 0x2E)  # ङ ञ ण न म
+CONSONANTS = (0x15, 0x39)  # क to ह
+
+ZWNJ = "\u200c"
+ZWJ = "\u200d"
+
+
+def _build_translation() -> dict[int, str | None]:
+    table: dict[int, str | None] = {ord(ZWNJ): None, ord(ZWJ): None}
+
+    # Latin diacritics, separated from their letters by NFD (ā -> a, ṇ -> n)
+    table.update({code: None for code in range(0x0300, 0x0370)})
+
+    # Vedic accents (udatta, anudatta, ...) and the Vedic extensions blocks
+    table.update({code: None for code in range(0x0951, 0x0955)})
+    table.update({code: None for code in range(0x1CD0, 0x1D00)})
+    table.update({code: None for code in range(0xA8E0, 0xA8F2)})
+
+    for base in SCRIPT_BASES:
+        table[base + CANDRABINDU] = chr(base + ANUSVARA)
+        table[base + VISARGA] = None
+        table[base + NUKTA] = None
+        table[base + AVAGRAHA] = None
+
+    return table
+
+
+TRANSLATION = _build_translation()
+
+
+def _build_nasal_rules() -> list[tuple[re.Pattern, str]]:
+    rules = []
+
+    for base in SCRIPT_BASES:
+        nasals = "".join(chr(base + nasal) for nasal in NASALS)
+        consonants = f"{chr(base + CONSONANTS[0])}-{chr(base + CONSONANTS[1])}"
+        anusvara = chr(base + ANUSVARA)
+
+        # A nasal consonant closing a syllable before a consonant is an anusvara
+        rules.append(
+            (re.compile(f"[{nasals}]{chr(base + VIRAMA)}(?=[{consonants}])"), anusvara)
+        )
+        # A word-final anusvara is a ma with virama
+        rules.append((re.compile(f"{anusvara}$"), chr(base + MA) + chr(base + VIRAMA)))
+
+    return rules
+
+
+NASAL_RULES = _build_nasal_rules()
+
+
+@lru_cache(maxsize=65536)
+def normalize_term(term: str) -> str:
+    """
+    Fold a word to the form it is indexed and searched by.
+
+    Words typed with different conventions fold to the same form: case,
+    Latin diacritics (pūrṇam -> purnam), nukta, ZWJ/ZWNJ, Vedic accents,
+    visarga and avagraha are dropped, candrabindu and a nasal consonant before
+    another consonant become anusvara, and a final anusvara becomes म्.
+
+    Parameters:
+        term (str): A single word, as split by `app.isha.search.tokenize`.
+    """
+    term = unicodedata.normalize("NFD", term.casefold()).translate(TRANSLATION)
+
+    for pattern, replacement in NASAL_RULES:
+        term = pattern.sub(replacement, term)
+
+    return unicodedata.normalize("NFC", term)
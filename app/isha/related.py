@@ -0,0 +1,139 @@
+import threading
+from collections import Counter
+from typing import Iterable, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from app.isha import models
+from app.isha.cache import content_version
+from app.utils import ContentType
+
+# Search documents a sutra is compared by
+RELATED_CONTENT = (
+    ContentType.sutra.value,
+    ContentType.meaning.value,
+    ContentType.interpretation.value,
+)
+
+
+class RelatedSutras:
+    """
+    Cosine similarity of every pair of sutras, by the TF-IDF weights of the
+    terms of their text, meanings and interpretations.
+
+    The term counts are read from the search documents, which hold the text
+    already tokenized. After content changes, only the counts of the sutras
+    written since the last build are reloaded; the TF-IDF matrix and the
+    sutra x sutra similarity matrix are then recomputed in a few vectorized
+    operations, so a request only looks up a row. Like the other caches, it is
+    per process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._counts: dict[int, Counter] = {}
+        self._numbers: list[int] = []
+        self._positions: dict[int, int] = {}
+        self._similarity = np.zeros((0, 0), dtype=np.float32)
+        # Column indices of each row, most similar sutra first
+        self._ranking = np.zeros((0, 0), dtype=np.intp)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version = None
+            self._counts = {}
+            self._compute()
+
+    def related(
+        self, db: Session, sutra_no: int, k: int
+    ) -> Optional[list[tuple[int, float]]]:
+        """
+        The `k` sutras most similar to `sutra_no` with their similarity, from 0 to
+        1, most similar first. Sutras sharing no term are left out.
+
+        Returns:
+            list, optional: None when the sutra has no indexed content.
+        """
+        self._update(db)
+
+        with self._lock:
+            position = self._positions.get(sutra_no)
+            if position is None:
+                return None
+
+            related = []
+            for column in self._ranking[position, :k]:
+                score = float(self._similarity[position, column])
+                if score <= 0:
+                    break
+                related.append((self._numbers[column], score))
+
+        return related
+
+    def _update(self, db: Session) -> None:
+        # Read the version before loading, see `CorpusSnapshots.get`
+        version = content_version.sync(db)
+        if self._version == version:
+            return
+
+        with self._lock:
+            if self._version == version:
+                return
+
+            if self._version is None:
+                self._counts = {}
+                self._load(db, None)
+            else:
+                changed = content_version.changed_since(self._version)
+                for sutra_no in changed:
+                    self._counts.pop(sutra_no, None)
+                if changed:
+                    self._load(db, changed)
+
+            self._compute()
+            self._version = version
+
+    def _load(self, db: Session, sutra_nos: Optional[Iterable[int]]) -> None:
+        query = db.query(
+            models.SearchDocument.sutra_no, models.SearchDocument.terms
+        ).filter(models.SearchDocument.content_type.in_(RELATED_CONTENT))
+        if sutra_nos is not None:
+            query = query.filter(models.SearchDocument.sutra_no.in_(sutra_nos))
+
+        for sutra_no, terms in query:
+            self._counts.setdefault(sutra_no, Counter()).update(terms.split())
+
+    def _compute(self) -> None:
+        self._numbers = sorted(self._counts)
+        self._positions = {number: row for row, number in enumerate(self._numbers)}
+
+        columns: dict[str, int] = {}
+        rows, cols, values = [], [], []
+        for row, number in enumerate(self._numbers):
+            for term, count in self._counts[number].items():
+                rows.append(row)
+                cols.append(columns.setdefault(term, len(columns)))
+                values.append(count)
+
+        tf = np.zeros((len(self._numbers), len(columns)), dtype=np.float32)
+        tf[rows, cols] = values
+
+        # Smoothed IDF, as in scikit-learn's TfidfVectorizer
+        document_frequency = np.count_nonzero(tf, axis=0)
+        idf = np.log((1 + len(self._numbers)) / (1 + document_frequency)) + 1
+        tfidf = tf * idf.astype(np.float32)
+
+        norms = np.linalg.norm(tfidf, axis=1, keepdims=True)
+        tfidf /= np.maximum(norms, np.finfo(np.float32).tiny)
+
+        similarity = tfidf @ tfidf.T
+        # A sutra is not related to itself
+        np.fill_diagonal(similarity, -1)
+
+        self._similarity = similarity
+        self._ranking = np.argsort(-similarity, axis=1, kind="stable")
+
+
+related_sutras = RelatedSutras()
@@ -0,0 +1,167 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_async_db
+from app.isha import models, schemas
+from app.utils import Language, Mode, Philosophy
+
+from .audio import get_audio_or_404
+from .bhashyam import get_bhashyam_or_404
+from .interpretations import get_interpretation_or_404
+from .meanings import get_meaning_or_404
+from .sutras import get_sutra_full_or_404
+from .transliterations import get_transliteration_or_404
+from .utils import (
+    cached_response,
+    cached_response_async,
+    corpus_etag_async,
+    get_cached_sutra_or_404_async,
+    sutra_etag_async,
+)
+
+# Async versions of the isha sutra content GET handlers, served from the async
+# engine. They are only registered when an async database URL is configured, ahead
+# of the sync routers so that they take precedence. The sync routes document the
+# API. The corpus, search, suggest, related sutras and audio streaming routes have
+# no async version and always use the sync engine.
+router = APIRouter(prefix="/sutras", tags=["Sutras"], include_in_schema=False)
+
+
+@router.get("/", dependencies=[Depends(corpus_etag_async)])
+async def get_sutras_async(
+    response: Response, db: AsyncSession = Depends(get_async_db)
+):
+    return await cached_response_async(
+        response,
+        List[schemas.SutraListOut],
+        db,
+        lambda session: session.query(models.Sutra.id, models.Sutra.number).all(),
+        "sutras",
+    )
+
+
+@router.get("/{sutra_no}", dependencies=[Depends(sutra_etag_async)])
+async def get_sutra_async(
+    sutra_no: int, response: Response, db: AsyncSession = Depends(get_async_db)
+):
+    sutra = await get_cached_sutra_or_404_async(sutra_no, db)
+
+    return cached_response(response, schemas.SutraOut, lambda: sutra, "sutra", sutra_no)
+
+
+@router.get("/{sutra_no}/full", dependencies=[Depends(sutra_etag_async)])
+async def get_sutra_full_async(
+    sutra_no: int,
+    response: Response,
+    lang: Language = Language.en,
+    phil: Philosophy = Philosophy.advaita,
+    mode: Mode = Mode.chant,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await cached_response_async(
+        response,
+        schemas.SutraFullOut,
+        db,
+        lambda session: get_sutra_full_or_404(sutra_no, lang, phil, mode, session),
+        "full",
+        sutra_no,
+        lang=lang,
+        phil=phil,
+        mode=mode,
+    )
+
+
+@router.get("/{sutra_no}/meaning", dependencies=[Depends(sutra_etag_async)])
+async def get_meaning_async(
+    sutra_no: int,
+    response: Response,
+    lang: Language = Language.en,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await cached_response_async(
+        response,
+        schemas.MeaningOut,
+        db,
+        lambda session: get_meaning_or_404(sutra_no, lang, session),
+        "meaning",
+        sutra_no,
+        lang=lang,
+    )
+
+
+@router.get("/{sutra_no}/transliteration", dependencies=[Depends(sutra_etag_async)])
+async def get_transliteration_async(
+    sutra_no: int,
+    response: Response,
+    lang: Language = Language.en,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await cached_response_async(
+        response,
+        schemas.TransliterationOut,
+        db,
+        lambda session: get_transliteration_or_404(sutra_no, lang, session),
+        "transliteration",
+        sutra_no,
+        lang=lang,
+    )
+
+
+@router.get("/{sutra_no}/interpretation", dependencies=[Depends(sutra_etag_async)])
+async def get_interpretation_async(
+    sutra_no: int,
+    response: Response,
+    lang: Language = Language.en,
+    phil: Philosophy = Philosophy.advaita,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await cached_response_async(
+        response,
+        schemas.InterpretationOut,
+        db,
+        lambda session: get_interpretation_or_404(sutra_no, lang, phil, session),
+        "interpretation",
+        sutra_no,
+        lang=lang,
+        phil=phil,
+    )
+
+
+@router.get("/{sutra_no}/bhashyam", dependencies=[Depends(sutra_etag_async)])
+async def get_bhashyam_async(
+    sutra_no: int,
+    response: Response,
+    lang: Language = Language.en,
+    philosophy: Philosophy = Philosophy.advaita,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await cached_response_async(
+        response,
+        schemas.BhashyamOut,
+        db,
+        lambda session: get_bhashyam_or_404(sutra_no, lang, philosophy, session),
+        "bhashyam",
+        sutra_no,
+        lang=lang,
+        phil=philosophy,
+    )
+
+
+@router.get("/{sutra_no}/audio", dependencies=[Depends(sutra_etag_async)])
+async def get_audio_async(
+    sutra_no: int,
+    mode: Mode,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await cached_response_async(
+        response,
+        schemas.Audio,
+        db,
+        lambda session: get_audio_or_404(sutra_no, mode, session),
+        "audio",
+        sutra_no,
+        mode=mode,
+    )
@@ -1,41 +1,226 @@
+import contextlib
+import hashlib
+import os
+import tempfile
+import uuid
 from pathlib import Path
+from typing import Iterator, Optional
 
-from fastapi import APIRouter, Depends, File, UploadFile, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, File, Request, Response, UploadFile, status
+from fastapi.responses import FileResponse, JSONResponse
+from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
 
 from app import models as app_models
 from app import oauth2, utils
+from app.config import settings
 from app.database import get_db
-from app.errors import conflict_error_response, not_found_error_response
+from app.errors import (
+    conflict_error_response,
+    not_found_error_response,
+    payload_too_large_error_response,
+)
 from app.isha import models, schemas
+from app.isha.cache import content_version
 
-from .utils import get_sutra_or_404
+from .utils import (
+    cached_response,
+    conflict_on_duplicate,
+    content_changed,
+    etag_matches,
+    get_cached_sutra_or_404,
+    get_sutra_child_or_404,
+    sutra_etag,
+)
 
 STATIC_AUDIO_DIR = Path("static/isha/")
 STATIC_AUDIO_DIR.mkdir(parents=True, exist_ok=True)
 
+# Audio files are stored under the SHA-256 of their content, sharded by its
+# first two bytes: audio/ab/cd/abcd...ef.mp3
+AUDIO_STORE_DIR = "audio"
+(STATIC_AUDIO_DIR / AUDIO_STORE_DIR).mkdir(exist_ok=True)
+
+# Uploads are copied in chunks of this size, never held in memory as a whole
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 router = APIRouter(prefix="/sutras", tags=["Audio"])
 
 
-def get_audio_or_404(sutra_id: int, mode: utils.Mode, db: Session):
-    db_audio = (
-        db.query(models.Audio)
-        .filter(models.Audio.sutra_id == sutra_id, models.Audio.mode == mode)
-        .first()
+class ImmutableStaticFiles(StaticFiles):
+    """Static files named after their content, which never change."""
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+@contextlib.contextmanager
+def store_upload(file: UploadFile) -> Iterator[tuple[Path, str]]:
+    """
+    Store an uploaded file under its SHA-256, copying it in `UPLOAD_CHUNK_SIZE`
+    chunks and rejecting it with 413 once it exceeds `isha_audio_max_bytes`.
+
+    Wrap the transaction that references the file: the upload is hashed while it
+    is written to a temporary file, which is synced to disk and renamed to its
+    content path only once the block succeeds, so readers never see a partial
+    file and a failed block leaves nothing behind. Content already stored, under
+    any extension, keeps its path; renaming over it restores it in case
+    `delete_unreferenced_file` removed it before the new reference committed.
+
+    Yields:
+        tuple[Path, str]: Path of the stored file and its SHA-256 (hex).
+    """
+    max_bytes = settings.isha_audio_max_bytes
+    too_large = f"Audio files are limited to {max_bytes} bytes."
+
+    if file.size is not None and file.size > max_bytes:
+        payload_too_large_error_response(too_large)
+
+    store_dir = STATIC_AUDIO_DIR / AUDIO_STORE_DIR
+    store_dir.mkdir(parents=True, exist_ok=True)
+    sha256 = hashlib.sha256()
+
+    fd, temp_path = tempfile.mkstemp(dir=store_dir, prefix=".upload.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            size = 0
+            while chunk := file.file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    payload_too_large_error_response(too_large)
+                sha256.update(chunk)
+                buffer.write(chunk)
+
+            buffer.flush()
+            os.fsync(buffer.fileno())
+            # mkstemp creates files readable by their owner only
+            os.fchmod(buffer.fileno(), 0o644)
+
+        digest = sha256.hexdigest()
+        shard_dir = store_dir / digest[:2] / digest[2:4]
+        extension = Path(file.filename or "").suffix.lower()
+        file_path = next(shard_dir.glob(f"{digest}*"), None)
+        if file_path is None:
+            file_path = shard_dir / f"{digest}{extension}"
+
+        yield file_path, digest
+
+        shard_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(temp_path, file_path)
+        except PermissionError:
+            # Windows cannot replace a file open for reading, so it is in place
+            pass
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(temp_path)
+
+
+def delete_unreferenced_file(db: Session, file_path: str, sha256: Optional[str]):
+    """
+    Delete a file of the content store once no audio references it any more,
+    after the audio that did was changed or deleted and committed.
+
+    The file is moved aside before the final check and moved back if an upload
+    of the same content committed a reference meanwhile (see `store_upload`).
+    Files stored before content addressing have no hash and are left alone.
+    """
+    if sha256 is None:
+        return
+
+    def referenced():
+        return (
+            db.query(models.Audio.id)
+            .filter(models.Audio.file_path == file_path)
+            .first()
+        )
+
+    if referenced():
+        return
+
+    trash_path = STATIC_AUDIO_DIR / AUDIO_STORE_DIR / f".delete.{uuid.uuid4().hex}"
+    try:
+        os.replace(file_path, trash_path)
+    except OSError:
+        # Already gone, or open for reading on Windows
+        return
+
+    # Start a new transaction, which sees references committed after the move
+    db.rollback()
+
+    if referenced():
+        os.replace(trash_path, file_path)
+    else:
+        os.unlink(trash_path)
+
+
+def get_audio_or_404(sutra_no: int, mode: utils.Mode, db: Session):
+    return get_sutra_child_or_404(models.Audio, sutra_no, db, models.Audio.mode == mode)
+
+
+@router.get(
+    "/{sutra_no}/audio",
+    response_model=schemas.Audio,
+    dependencies=[Depends(sutra_etag)],
+)
+def get_audio(
+    sutra_no: int, mode: utils.Mode, response: Response, db: Session = Depends(get_db)
+):
+    return cached_response(
+        response,
+        schemas.Audio,
+        lambda: get_audio_or_404(sutra_no, mode, db),
+        "audio",
+        sutra_no,
+        mode=mode,
     )
 
-    if not db_audio:
-        return not_found_error_response()
 
-    return db_audio
+@router.get(
+    "/{sutra_no}/audio/stream",
+    response_class=FileResponse,
+    responses={
+        status.HTTP_206_PARTIAL_CONTENT: {"description": "Part of the audio file"}
+    },
+)
+def stream_audio(
+    sutra_no: int, mode: utils.Mode, request: Request, db: Session = Depends(get_db)
+):
+    """
+    Serve a sutra's audio file itself, for players.
+
+    `Range` requests are answered with 206 Partial Content, so players can seek
+    without downloading the whole file. Responses may be cached for
+    `ISHA_AUDIO_MAX_AGE` seconds and are then revalidated with their ETag, the
+    SHA-256 of the file. The `file_path` returned by the audio endpoint changes
+    with the content instead and is cached forever.
+    """
+    audio = get_audio_or_404(sutra_no, mode, db)
+
+    try:
+        stat_result = os.stat(audio.file_path)
+    except FileNotFoundError:
+        not_found_error_response("Audio file not found.")
 
+    headers = {"Cache-Control": f"public, max-age={settings.isha_audio_max_age}"}
+    # Files stored before content addressing have no hash, see `store_upload`
+    if audio.sha256:
+        headers["ETag"] = f'"{audio.sha256}"'
+
+    response = FileResponse(audio.file_path, stat_result=stat_result, headers=headers)
+
+    if etag_matches(request.headers.get("if-none-match"), response.headers["etag"]):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={
+                key: response.headers[key]
+                for key in ("etag", "last-modified", "cache-control")
+            },
+        )
 
-@router.get("/{sutra_no}/audio", response_model=schemas.Audio)
-def get_audio(sutra_no: int, mode: utils.Mode, db: Session = Depends(get_db)):
-    sutra = get_sutra_or_404(sutra_no, db)
-    audio = get_audio_or_404(sutra.id, mode, db)
-    return audio
+    return response
 
 
 @router.post("/{sutra_no}/audio", status_code=status.HTTP_201_CREATED)
@@ -46,7 +231,7 @@ def create_audio(
     db: Session = Depends(get_db),
     current_user: app_models.User = Depends(oauth2.get_current_user),
 ):
-    sutra = get_sutra_or_404(sutra_no, db)
+    sutra = get_cached_sutra_or_404(sutra_no, db)
 
     db_audio = (
         db.query(models.Audio)
@@ -54,27 +239,33 @@ def create_audio(
         .first()
     )
 
-    if db_audio:
-        return conflict_error_response(
-            f"Audio for sutra {sutra_no} in {mode} mode already exists!"
-        )
-
-    mode_dir = STATIC_AUDIO_DIR / mode
-    mode_dir.mkdir(parents=True, exist_ok=True)
-    file_extension = Path(file.filename or "").suffix
-    file_path = mode_dir / f"sutra_{sutra_no}{file_extension}"
+    detail = f"Audio for sutra {sutra_no} in {mode} mode already exists!"
 
-    with open(file_path, "wb") as buffer:
-        buffer.write(file.file.read())
+    if db_audio:
+        return conflict_error_response(detail)
 
-    audio = models.Audio(file_path=str(file_path), sutra_id=sutra.id, mode=mode)
-    db.add(audio)
-    db.commit()
+    # A failed commit leaves no stored file behind, see `store_upload`
+    with store_upload(file) as (file_path, sha256):
+        audio = models.Audio(
+            file_path=file_path.as_posix(), sha256=sha256, sutra_id=sutra.id, mode=mode
+        )
+        db.add(audio)
+        content_version.bump(db, sutra_no)
+        with conflict_on_duplicate(db, detail):
+            db.commit()
     db.refresh(audio)
 
+    content_changed(sutra_no)
+
     return JSONResponse(
         status_code=status.HTTP_201_CREATED,
-        content={"audio": {"id": audio.id, "file_path": audio.file_path}},
+        content={
+            "audio": {
+                "id": audio.id,
+                "file_path": audio.file_path,
+                "sha256": audio.sha256,
+            }
+        },
     )
 
 
@@ -86,20 +277,20 @@ def update_audio(
     db: Session = Depends(get_db),
     current_user: app_models.User = Depends(oauth2.get_current_user),
 ):
-    sutra = get_sutra_or_404(sutra_no, db)
-    db_audio = get_audio_or_404(sutra.id, mode, db)
+    db_audio = get_audio_or_404(sutra_no, mode, db)
+    previous = (db_audio.file_path, db_audio.sha256)
 
-    mode_dir = STATIC_AUDIO_DIR / mode
-    mode_dir.mkdir(parents=True, exist_ok=True)
-    file_extension = Path(file.filename or "").suffix
-    file_path = mode_dir / f"sutra_{sutra_no}{file_extension}"
+    with store_upload(file) as (file_path, sha256):
+        db_audio.file_path = file_path.as_posix()
+        db_audio.sha256 = sha256
+        content_version.bump(db, sutra_no)
+        db.commit()
+    db.refresh(db_audio)
 
-    with open(file_path, "wb") as buffer:
-        buffer.write(file.file.read())
+    content_changed(sutra_no)
 
-    db_audio.file_path = str(file_path)
-    db.commit()
-    db.refresh(db_audio)
+    # Other audios may share the previous file
+    delete_unreferenced_file(db, *previous)
 
 
 @router.delete("/{sutra_no}/audio", status_code=status.HTTP_204_NO_CONTENT)
@@ -109,8 +300,14 @@ def delete_audio(
     db: Session = Depends(get_db),
     current_admin: app_models.User = Depends(oauth2.get_current_admin),
 ):
-    sutra = get_sutra_or_404(sutra_no, db)
-    audio = get_audio_or_404(sutra.id, mode, db)
+    audio = get_audio_or_404(sutra_no, mode, db)
+    stored = (audio.file_path, audio.sha256)
 
     db.delete(audio)
+    content_version.bump(db, sutra_no)
     db.commit()
+
+    content_changed(sutra_no)
+
+    # Other audios may share the file
+    delete_unreferenced_file(db, *stored)
@@ -1,11 +1,20 @@
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, Response, status, HTTPException
 from sqlalchemy.orm import Session
 from app import models as app_models
 from app import oauth2
 from app.database import get_db
 from app.isha import models, schemas
+from app.isha.search import reindex_sutras
 from app.utils import Language, Philosophy
-from .utils import get_sutra_or_404
+from .utils import (
+    cached_response,
+    conflict_if_taken,
+    conflict_on_duplicate,
+    content_changed,
+    get_cached_sutra_or_404,
+    get_sutra_child_or_404,
+    sutra_etag,
+)
 import logging
 
 # Logger setup
@@ -18,30 +27,38 @@ router = APIRouter(prefix="/sutras", tags=["Bhashyams"])
 def get_bhashyam_or_404(sutra_no: int, language: Language, philosophy: Philosophy, db: Session):
     """Retrieve a Bhashyam object or raise a 404 error."""
     logger.info(f"Fetching Bhashyam: Sutra {sutra_no}, Language {language}, Philosophy {philosophy}")
-    db_bhashyam = (
-        db.query(models.Bhashyam)
-        .join(models.Sutra, models.Bhashyam.sutra_id == models.Sutra.id)
-        .filter(models.Sutra.number == sutra_no)
-        .filter(models.Bhashyam.language == language)
-        .filter(models.Bhashyam.philosophy == philosophy)
-        .first()
+    return get_sutra_child_or_404(
+        models.Bhashyam,
+        sutra_no,
+        db,
+        models.Bhashyam.language == language,
+        models.Bhashyam.philosophy == philosophy,
+        detail="Bhashyam not found.",
     )
-    if not db_bhashyam:
-        logger.error(f"Bhashyam not found for Sutra {sutra_no}, Language {language}, Philosophy {philosophy}")
-        raise HTTPException(status_code=404, detail="Bhashyam not found.")
-    return db_bhashyam
 
 
-@router.get("/{sutra_no}/bhashyam", response_model=schemas.BhashyamOut)
+@router.get(
+    "/{sutra_no}/bhashyam",
+    response_model=schemas.BhashyamOut,
+    dependencies=[Depends(sutra_etag)],
+)
 def get_bhashyam(
     sutra_no: int,
+    response: Response,
     lang: Language = Language.en,
     philosophy: Philosophy = Philosophy.advaita,
     db: Session = Depends(get_db),
 ):
     """Retrieve a Bhashyam for a specific Sutra."""
-    sutra = get_sutra_or_404(sutra_no, db)
-    return get_bhashyam_or_404(sutra_no, lang, philosophy, db)
+    return cached_response(
+        response,
+        schemas.BhashyamOut,
+        lambda: get_bhashyam_or_404(sutra_no, lang, philosophy, db),
+        "bhashyam",
+        sutra_no,
+        lang=lang,
+        phil=philosophy,
+    )
 
 
 @router.post("/{sutra_no}/bhashyam", status_code=status.HTTP_201_CREATED)
@@ -55,7 +72,7 @@ def add_bhashyam(
     logger.info(f"Adding Bhashyam for Sutra {sutra_no} by User {current_user.id}")
     
     # Validate if Sutra exists
-    sutra = get_sutra_or_404(sutra_no, db)
+    sutra = get_cached_sutra_or_404(sutra_no, db)
 
     # Check for existing Bhashyam
     db_bhashyam = (
@@ -80,9 +97,13 @@ def add_bhashyam(
         text=bhashyam.text,
     )
     db.add(new_bhashyam)
-    db.commit()
+    with conflict_on_duplicate(db, f"Bhashyam for Sutra {sutra_no} already exists!"):
+        reindex_sutras(db, sutra_no)
+        db.commit()
     db.refresh(new_bhashyam)
 
+    content_changed(sutra_no)
+
     logger.info(f"Bhashyam created with ID: {new_bhashyam.id}")
     return {"id": new_bhashyam.id}
 
@@ -100,14 +121,31 @@ def update_bhashyam(
     logger.info(f"Updating Bhashyam for Sutra {sutra_no}, Language {lang}, Philosophy {phil}")
 
     # Validate if Sutra and Bhashyam exist
-    sutra = get_sutra_or_404(sutra_no, db)
     db_bhashyam = get_bhashyam_or_404(sutra_no, lang, phil, db)
 
+    changes = bhashyam.dict(exclude_unset=True)
+    philosophy = changes.get("philosophy") or phil
+    detail = f"Bhashyam for Sutra {sutra_no} in philosophy {philosophy.value} already exists!"
+
+    # Another Bhashyam may already use the new philosophy
+    if changes.get("philosophy") is not None:
+        conflict_if_taken(
+            db,
+            models.Bhashyam,
+            db_bhashyam,
+            detail,
+            language=db_bhashyam.language,
+            philosophy=philosophy,
+        )
+
     # Update fields
-    for key, value in bhashyam.dict(exclude_unset=True).items():
+    for key, value in changes.items():
         setattr(db_bhashyam, key, value)
 
-    db.commit()
+    with conflict_on_duplicate(db, detail):
+        reindex_sutras(db, sutra_no)
+        db.commit()
+    content_changed(sutra_no)
     logger.info(f"Bhashyam updated for Sutra {sutra_no}")
 
 
@@ -123,10 +161,11 @@ def delete_bhashyam(
     logger.info(f"Deleting Bhashyam for Sutra {sutra_no}, Language {lang}, Philosophy {phil}")
 
     # Validate if Sutra and Bhashyam exist
-    sutra = get_sutra_or_404(sutra_no, db)
     bhashyam = get_bhashyam_or_404(sutra_no, lang, phil, db)
 
     # Delete the Bhashyam
     db.delete(bhashyam)
+    reindex_sutras(db, sutra_no)
     db.commit()
+    content_changed(sutra_no)
     logger.info(f"Bhashyam deleted for Sutra {sutra_no}")
@@ -0,0 +1,36 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.isha import schemas
+from app.isha.corpus import corpus_snapshots
+from app.utils import Language, Philosophy
+
+from .utils import corpus_etag
+
+router = APIRouter(prefix="/corpus", tags=["Corpus"])
+
+
+@router.get(
+    "",
+    response_model=schemas.CorpusOut,
+    dependencies=[Depends(corpus_etag)],
+)
+def get_corpus(
+    response: Response,
+    lang: Optional[Language] = None,
+    phil: Optional[Philosophy] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    Retrieve every sutra with all its children in one document, optionally
+    limited to one language and philosophy.
+    """
+    snapshot = corpus_snapshots.get(db, lang, phil)
+
+    # Returning a Response directly skips the validator headers set on `response`
+    return Response(
+        content=snapshot, media_type="application/json", headers=response.headers
+    )
@@ -1,47 +1,60 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
 from sqlalchemy.orm import Session
 
 from app import models as app_models
 from app import oauth2
 from app.database import get_db
-from app.errors import conflict_error_response, not_found_error_response
+from app.errors import conflict_error_response
 from app.isha import models, schemas
+from app.isha.search import reindex_sutras
 from app.utils import Language, Philosophy
 
-from .utils import get_sutra_or_404
+from .utils import (
+    cached_response,
+    conflict_if_taken,
+    conflict_on_duplicate,
+    content_changed,
+    get_cached_sutra_or_404,
+    get_sutra_child_or_404,
+    sutra_etag,
+)
 
 router = APIRouter(prefix="/sutras", tags=["Interpretations"])
 
 
 def get_interpretation_or_404(
-    sutra_id: int, language: Language, phil: Philosophy, db: Session
+    sutra_no: int, language: Language, phil: Philosophy, db: Session
 ):
-    db_interpretation = (
-        db.query(models.Interpretation)
-        .filter(models.Interpretation.sutra_id == sutra_id)
-        .filter(models.Interpretation.language == language)
-        .filter(models.Interpretation.philosophy == phil)
-        .first()
+    return get_sutra_child_or_404(
+        models.Interpretation,
+        sutra_no,
+        db,
+        models.Interpretation.language == language,
+        models.Interpretation.philosophy == phil,
     )
 
-    if not db_interpretation:
-        not_found_error_response()
-
-    return db_interpretation
-2
 
-@router.get("/{sutra_no}/interpretation", response_model=schemas.InterpretationOut)
+@router.get(
+    "/{sutra_no}/interpretation",
+    response_model=schemas.InterpretationOut,
+    dependencies=[Depends(sutra_etag)],
+)
 def get_interpretation(
     sutra_no: int,
+    response: Response,
     lang: Language = Language.en,
     phil: Philosophy = Philosophy.advaita,
     db: Session = Depends(get_db),
 ):
-    sutra = get_sutra_or_404(sutra_no, db)
-
-    interpretation = get_interpretation_or_404(sutra.id, lang, phil, db)
-
-    return interpretation
+    return cached_response(
+        response,
+        schemas.InterpretationOut,
+        lambda: get_interpretation_or_404(sutra_no, lang, phil, db),
+        "interpretation",
+        sutra_no,
+        lang=lang,
+        phil=phil,
+    )
 
 
 @router.post("/{sutra_no}/interpretation", status_code=status.HTTP_201_CREATED)
@@ -52,7 +65,7 @@ def add_interpretation(
     current_user: app_models.User = Depends(oauth2.get_current_user),
 ):
     # Retrieve sutra or raise 404 if not found
-    sutra = get_sutra_or_404(sutra_no, db)
+    sutra = get_cached_sutra_or_404(sutra_no, db)
 
     # Check if interpretation for the given sutra and language already exists
     db_interpretation = (
@@ -63,19 +76,23 @@ def add_interpretation(
         .first()
     )
 
+    detail = f"Interpretation for sutra {sutra_no} in language {interpretation.language} already exists!"
+
     if db_interpretation:
-        conflict_error_response(
-            f"Interpretation for sutra {sutra_no} in language {interpretation.language} already exists!"
-        )
+        conflict_error_response(detail)
 
     new_interpretation = models.Interpretation(
         **interpretation.model_dump(), sutra_id=sutra.id
     )
 
     db.add(new_interpretation)
-    db.commit()
+    with conflict_on_duplicate(db, detail):
+        reindex_sutras(db, sutra_no)
+        db.commit()
     db.refresh(new_interpretation)
 
+    content_changed(sutra_no)
+
     return {"id": new_interpretation.id}
 
 
@@ -88,17 +105,34 @@ def update_interpretation(
     db: Session = Depends(get_db),
     current_user: app_models.User = Depends(oauth2.get_current_user),
 ):
-    sutra = get_sutra_or_404(sutra_no, db)
+    db_interpretation = get_interpretation_or_404(sutra_no, lang, phil, db)
+    detail = (
+        f"Interpretation for sutra {sutra_no} in language"
+        f" {interpretation.language.value} and philosophy"
+        f" {interpretation.philosophy.value} already exists!"
+    )
 
-    db_interpretation = get_interpretation_or_404(sutra.id, lang, phil, db)
+    # Another interpretation may already use the new language and philosophy
+    conflict_if_taken(
+        db,
+        models.Interpretation,
+        db_interpretation,
+        detail,
+        language=interpretation.language,
+        philosophy=interpretation.philosophy,
+    )
 
     # Update the fields
     for key, value in interpretation.model_dump().items():
         setattr(db_interpretation, key, value)
 
-    db.commit()
+    with conflict_on_duplicate(db, detail):
+        reindex_sutras(db, sutra_no)
+        db.commit()
     db.refresh(db_interpretation)
 
+    content_changed(sutra_no)
+
 
 @router.delete("/{sutra_no}/interpretation", status_code=status.HTTP_204_NO_CONTENT)
 def delete_interpretation(
@@ -108,8 +142,10 @@ def delete_interpretation(
     db: Session = Depends(get_db),
     current_admin: app_models.User = Depends(oauth2.get_current_admin),
 ):
-    sutra = get_sutra_or_404(sutra_no, db)
-    interpretation = get_interpretation_or_404(sutra.id, lang, phil, db)
+    interpretation = get_interpretation_or_404(sutra_no, lang, phil, db)
 
     db.delete(interpretation)
+    reindex_sutras(db, sutra_no)
     db.commit()
+
+    content_changed(sutra_no)
@@ -1,41 +1,52 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
 from sqlalchemy.orm import Session
 
 from app import models as app_models
 from app import oauth2
 from app.database import get_db
-from app.errors import conflict_error_response, not_found_error_response
+from app.errors import conflict_error_response
 from app.isha import models, schemas
+from app.isha.search import reindex_sutras
 from app.utils import Language
 
-from .utils import get_sutra_or_404
+from .utils import (
+    cached_response,
+    conflict_if_taken,
+    conflict_on_duplicate,
+    content_changed,
+    get_cached_sutra_or_404,
+    get_sutra_child_or_404,
+    sutra_etag,
+)
 
 router = APIRouter(prefix="/sutras", tags=["Meanings"])
 
 
-def get_meaning_or_404(sutra_id: int, language: Language, db: Session):
-    db_meaning = (
-        db.query(models.Meaning)
-        .filter(models.Meaning.sutra_id == sutra_id)
-        .filter(models.Meaning.language == language)
-        .first()
+def get_meaning_or_404(sutra_no: int, language: Language, db: Session):
+    return get_sutra_child_or_404(
+        models.Meaning, sutra_no, db, models.Meaning.language == language
     )
 
-    if not db_meaning:
-        not_found_error_response()
-
-    return db_meaning
-
 
-@router.get("/{sutra_no}/meaning", response_model=schemas.MeaningOut)
+@router.get(
+    "/{sutra_no}/meaning",
+    response_model=schemas.MeaningOut,
+    dependencies=[Depends(sutra_etag)],
+)
 def get_meaning(
-    sutra_no: int, lang: Language = Language.en, db: Session = Depends(get_db)
+    sutra_no: int,
+    response: Response,
+    lang: Language = Language.en,
+    db: Session = Depends(get_db),
 ):
-    sutra = get_sutra_or_404(sutra_no, db)
-
-    meaning = get_meaning_or_404(sutra.id, lang, db)
-
-    return meaning
+    return cached_response(
+        response,
+        schemas.MeaningOut,
+        lambda: get_meaning_or_404(sutra_no, lang, db),
+        "meaning",
+        sutra_no,
+        lang=lang,
+    )
 
 
 @router.post("/{sutra_no}/meaning", status_code=status.HTTP_201_CREATED)
@@ -46,7 +57,7 @@ def add_meaning(
     current_user: app_models.User = Depends(oauth2.get_current_user),
 ):
     # Retrieve sutra or raise 404 if not found
-    sutra = get_sutra_or_404(sutra_no, db)
+    sutra = get_cached_sutra_or_404(sutra_no, db)
 
     # Check if meaning for the given sutra and language already exists
     db_meaning = (
@@ -56,17 +67,23 @@ def add_meaning(
         .first()
     )
 
+    detail = (
+        f"Meaning for sutra {sutra_no} in language {meaning.language} already exists!"
+    )
+
     if db_meaning:
-        conflict_error_response(
-            f"Meaning for sutra {sutra_no} in language {meaning.language} already exists!"
-        )
+        conflict_error_response(detail)
 
     new_meaning = models.Meaning(**meaning.model_dump(), sutra_id=sutra.id)
 
     db.add(new_meaning)
-    db.commit()
+    with conflict_on_duplicate(db, detail):
+        reindex_sutras(db, sutra_no)
+        db.commit()
     db.refresh(new_meaning)
 
+    content_changed(sutra_no)
+
     return {"id": new_meaning.id}
 
 
@@ -78,17 +95,25 @@ def update_meaning(
     db: Session = Depends(get_db),
     current_user: app_models.User = Depends(oauth2.get_current_user),
 ):
-    sutra = get_sutra_or_404(sutra_no, db)
+    db_meaning = get_meaning_or_404(sutra_no, lang, db)
+    detail = (
+        f"Meaning for sutra {sutra_no} in language {meaning.language} already exists!"
+    )
 
-    db_meaning = get_meaning_or_404(sutra.id, lang, db)
+    # Another meaning may already use the new language
+    conflict_if_taken(db, models.Meaning, db_meaning, detail, language=meaning.language)
 
     # Update the fields
     for key, value in meaning.model_dump().items():
         setattr(db_meaning, key, value)
 
-    db.commit()
+    with conflict_on_duplicate(db, detail):
+        reindex_sutras(db, sutra_no)
+        db.commit()
     db.refresh(db_meaning)
 
+    content_changed(sutra_no)
+
 
 @router.delete("/{sutra_no}/meaning", status_code=status.HTTP_204_NO_CONTENT)
 def delete_meaning(
@@ -97,12 +122,10 @@ def delete_meaning(
     db: Session = Depends(get_db),
     current_admin: app_models.User = Depends(oauth2.get_current_admin),
 ):
-    sutra = get_sutra_or_404(sutra_no, db)
-    meaning = get_meaning_or_404(sutra.id, lang, db)
+    meaning = get_meaning_or_404(sutra_no, lang, db)
 
     db.delete(meaning)
+    reindex_sutras(db, sutra_no)
     db.commit()
 
-
-
-
+    content_changed(sutra_no)
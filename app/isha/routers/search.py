@@ -1,53 +1,231 @@
-from typing import List
-from fastapi import APIRouter, Depends
+import base64
+import binascii
+from typing import Iterator, Optional
+
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm.session import Session
 
+from app.config import settings
 from app.database import get_db
-from app.isha import models, schemas
+from app.errors import bad_request_error_response
+from app.isha import schemas
+from app.isha.cache import content_version, search_cache
+from app.isha.serializers import dump_json
+from app.isha.search import (
+    SearchFilters,
+    correct_words,
+    iter_documents,
+    make_snippet,
+    query_terms,
+    search_documents,
+    suggest,
+)
+from app.utils import ContentType, Language, Philosophy
 
+from .utils import check_not_modified, corpus_etag
 
 router = APIRouter(prefix="/search", tags=["Search"])
 
+NDJSON = "application/x-ndjson"
+
+# Deepest offset a cursor may point at; larger ones overflow SQLite's OFFSET
+MAX_CURSOR_OFFSET = 2**31 - 1
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON in request.headers.get("accept", "")
+
+
+def search_etag(
+    request: Request, response: Response, db: Session = Depends(get_db)
+) -> None:
+    """
+    `corpus_etag` for the search, whose JSON and NDJSON representations have
+    different ETags.
+    """
+    content_version.sync(db)
+    variant = "ndjson" if wants_ndjson(request) else None
+    check_not_modified(request, response, variant=variant, vary="Accept")
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(str(offset).encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> int:
+    if cursor is None:
+        return 0
+
+    try:
+        payload = base64.urlsafe_b64decode(cursor.encode()).decode()
+        offset = int(payload)
+    except (binascii.Error, ValueError):
+        offset = -1
+    else:
+        # Only accept cursors `encode_cursor` could have made, e.g. not " 2" or "+2"
+        if payload != str(offset):
+            offset = -1
+
+    if not 0 <= offset <= MAX_CURSOR_OFFSET:
+        bad_request_error_response("Invalid cursor.")
+
+    return offset
+
+
+def to_result(document, score: float, words: list[tuple[str, ...]]) -> dict:
+    if document.content_type == ContentType.interpretation:
+        mode = f"interpretation - {document.philosophy}"
+    elif document.content_type == ContentType.bhashyam:
+        mode = f"bhashyam - {document.philosophy}"
+    else:
+        mode = "chant"
+
+    snippet = make_snippet(document.text, words)
+    # Bhashyam passages start inside the bhashyam
+    snippet["offset"] += document.offset
+
+    return {
+        **snippet,
+        "content_type": document.content_type,
+        "score": score,
+        "sutra_no": document.sutra_no,
+        "mode": mode,
+        "lang": document.language,
+    }
+
+
+def stream_results(
+    db: Session,
+    words: list[tuple[str, ...]],
+    offset: int,
+    filters: SearchFilters,
+) -> Iterator[bytes]:
+    """Serialize the matching documents as NDJSON, one result per line."""
+    # FastAPI closes the request's session when the route returns, before the
+    # body is sent, so the stream runs in a new transaction and closes it itself
+    try:
+        for document, score in iter_documents(db, words, offset, filters):
+            yield dump_json(schemas.Result, to_result(document, score, words)) + b"\n"
+    finally:
+        db.close()
+
+
+# Declared before /{term}, which would match it
+@router.get(
+    "/suggest",
+    response_model=schemas.Suggestions,
+    dependencies=[Depends(corpus_etag)],
+)
+def suggest_words(
+    prefix: str,
+    k: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+):
+    """
+    Complete the last word of `prefix` to the `k` most frequent words of the
+    searchable content, typed in any script, for a search box.
+    """
+    return {
+        "suggestions": [
+            {"word": word, "frequency": frequency}
+            for word, frequency in suggest(db, prefix, k)
+        ]
+    }
+
+
+@router.get(
+    "/{term}",
+    response_model=schemas.SearchResults,
+    dependencies=[Depends(search_etag)],
+)
+def search(
+    term: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    similarity: Optional[float] = Query(None, gt=0, le=1),
+    content_type: Optional[ContentType] = Query(None, alias="type"),
+    content: Optional[ContentType] = Query(
+        None, deprecated=True, description="Use `type`, which it must agree with."
+    ),
+    lang: Optional[Language] = None,
+    phil: Optional[Philosophy] = None,
+    sutra_from: Optional[int] = Query(None, alias="from"),
+    sutra_to: Optional[int] = Query(None, alias="to"),
+    db: Session = Depends(get_db),
+):
+    """
+    Search the sutras, meanings, transliterations, interpretations and bhashyams,
+    best matches first. Pass the returned `next_cursor` to get the next page.
+
+    Results can be restricted to a content `type`, a language (`lang`), a
+    philosophy (`phil`) and the sutras numbered `from` to `to`. The filters are
+    applied by the index, not to its results.
+
+    Bhashyams are searched passage by passage: their results are snippets of the
+    matching passage, at their `offset` in the bhashyam.
+
+    Misspelled words match the indexed words whose trigram similarity is at
+    least `similarity`, above 0 and up to 1 (`ISHA_SEARCH_SIMILARITY_THRESHOLD`
+    by default).
+
+    With `Accept: application/x-ndjson`, every result after `cursor` is streamed
+    instead, one JSON object per line, as it is read from the database; `limit`
+    does not apply.
+    """
+    offset = decode_cursor(cursor)
+
+    if similarity is None:
+        similarity = settings.isha_search_similarity_threshold
+
+    if content_type and content and content_type != content:
+        bad_request_error_response("Conflicting `type` and `content`.")
+
+    content_type = content_type or content
+    filters = SearchFilters(
+        content_type=content_type and content_type.value,
+        language=lang and lang.value,
+        philosophy=phil and phil.value,
+        sutra_from=sutra_from,
+        sutra_to=sutra_to,
+    )
+
+    if wants_ndjson(request):
+        words = correct_words(db, query_terms(term), similarity)
+        return StreamingResponse(
+            stream_results(db, words, offset, filters),
+            media_type=NDJSON,
+            headers=response.headers,
+        )
+
+    # Spelling variants of a query fold to the same words and share an entry
+    query_words = query_terms(term)
+    key = (tuple(query_words), similarity, filters, limit, offset)
+    # Read the version before searching, see `CorpusSnapshots.get`
+    version = content_version.sync(db)
+    body = search_cache.get_results(key, version)
+
+    if body is None:
+        words = correct_words(db, query_words, similarity)
+        # Fetch one more document to know whether there is a next page
+        documents = search_documents(db, words, limit + 1, offset, filters)
+
+        body = dump_json(
+            schemas.SearchResults,
+            {
+                "results": [
+                    to_result(document, score, words)
+                    for document, score in documents[:limit]
+                ],
+                "next_cursor": (
+                    encode_cursor(offset + limit) if len(documents) > limit else None
+                ),
+            },
+        )
+        search_cache.set_results(key, version, body)
 
-@router.get("/{term}", response_model=List[schemas.Result])
-def search(term: str, db: Session = Depends(get_db)):
-    results = []
-
-    sutras = db.query(models.Sutra).filter(models.Sutra.text.ilike(f"%{term}%")).all()
-    for sutra in sutras:
-        results.append({
-            "text": sutra.text,
-            "sutra_no": sutra.number,
-            "mode": "chant",
-            "lang": None
-        })
-
-    meanings = db.query(models.Meaning).filter(models.Meaning.text.ilike(f"%{term}%")).all()
-    for meaning in meanings:
-        results.append({
-            "text": meaning.text,
-            "sutra_no": meaning.sutra.number,
-            "mode": "chant",
-            "lang": meaning.language
-        })
-
-
-    transliterations = db.query(models.Transliteration).filter(models.Transliteration.text.ilike(f"%{term}%")).all()
-    for transliteration in transliterations:
-        results.append({
-            "text": transliteration.text,
-            "sutra_no": transliteration.sutra.number,
-            "mode": "chant",
-            "lang": transliteration.language
-        })
-
-    interpretations = db.query(models.Interpretation).filter(models.Interpretation.text.ilike(f"%{term}%")).all()
-    for interpretation in interpretations:
-        results.append({
-            "text": interpretation.text,
-            "sutra_no": interpretation.sutra.number,
-            "mode": f"interpretation - {interpretation.philosophy}",
-            "lang": interpretation.language
-        })
-
-    return results
+    return Response(
+        content=body, media_type="application/json", headers=response.headers
+    )
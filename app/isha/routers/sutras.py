@@ -1,28 +1,158 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, Response, status
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
 from app import models as app_models
 from app import oauth2
 from app.database import get_db
-from app.errors import conflict_error_response
+from app.errors import conflict_error_response, not_found_error_response
 from app.isha import models, schemas
-
-from .utils import get_sutra_or_404
+from app.isha.search import reindex_sutras
+from app.isha.related import related_sutras
+from app.utils import Language, Mode, Philosophy
+
+from .audio import delete_unreferenced_file
+from .utils import (
+    cached_response,
+    content_changed,
+    corpus_etag,
+    get_cached_sutra_or_404,
+    get_sutra_or_404,
+    sutra_etag,
+)
 
 router = APIRouter(prefix="/sutras", tags=["Sutras"])
 
 
-@router.get("/", response_model=List[schemas.SutraListOut])
-def get_sutras(db: Session = Depends(get_db)):
-    return db.query(models.Sutra.id, models.Sutra.number).all()
+@router.get(
+    "/",
+    response_model=List[schemas.SutraListOut],
+    dependencies=[Depends(corpus_etag)],
+)
+def get_sutras(response: Response, db: Session = Depends(get_db)):
+    return cached_response(
+        response,
+        List[schemas.SutraListOut],
+        lambda: db.query(models.Sutra.id, models.Sutra.number).all(),
+        "sutras",
+    )
+
+
+@router.get(
+    "/{sutra_no}",
+    response_model=schemas.SutraOut,
+    dependencies=[Depends(sutra_etag)],
+)
+def get_sutra(sutra_no: int, response: Response, db: Session = Depends(get_db)):
+    return cached_response(
+        response,
+        schemas.SutraOut,
+        lambda: get_cached_sutra_or_404(sutra_no, db),
+        "sutra",
+        sutra_no,
+    )
+
+
+def get_sutra_full_or_404(
+    sutra_no: int, lang: Language, phil: Philosophy, mode: Mode, db: Session
+) -> dict:
+    sutra = (
+        db.query(models.Sutra)
+        .options(
+            selectinload(
+                models.Sutra.transliterations.and_(
+                    models.Transliteration.language == lang
+                )
+            ),
+            selectinload(models.Sutra.meanings.and_(models.Meaning.language == lang)),
+            selectinload(
+                models.Sutra.interpretations.and_(
+                    models.Interpretation.language == lang,
+                    models.Interpretation.philosophy == phil,
+                )
+            ),
+            selectinload(
+                models.Sutra.bhashyams.and_(
+                    models.Bhashyam.language == lang,
+                    models.Bhashyam.philosophy == phil,
+                )
+            ),
+            selectinload(models.Sutra.audios.and_(models.Audio.mode == mode)),
+        )
+        .filter(models.Sutra.number == sutra_no)
+        # Collections already loaded in the session would ignore the filters above
+        .populate_existing()
+        .first()
+    )
+
+    if not sutra:
+        not_found_error_response(f"Sutra {sutra_no} not found.")
+
+    return {
+        "id": sutra.id,
+        "number": sutra.number,
+        "text": sutra.text,
+        "transliteration": next(iter(sutra.transliterations), None),
+        "meaning": next(iter(sutra.meanings), None),
+        "interpretation": next(iter(sutra.interpretations), None),
+        "bhashyam": next(iter(sutra.bhashyams), None),
+        "audio": next(iter(sutra.audios), None),
+    }
+
+
+@router.get(
+    "/{sutra_no}/full",
+    response_model=schemas.SutraFullOut,
+    dependencies=[Depends(sutra_etag)],
+)
+def get_sutra_full(
+    sutra_no: int,
+    response: Response,
+    lang: Language = Language.en,
+    phil: Philosophy = Philosophy.advaita,
+    mode: Mode = Mode.chant,
+    db: Session = Depends(get_db),
+):
+    """
+    Retrieve a sutra together with its transliteration, meaning, interpretation,
+    bhashyam and audio in one response. Missing parts are returned as null.
+    """
+    return cached_response(
+        response,
+        schemas.SutraFullOut,
+        lambda: get_sutra_full_or_404(sutra_no, lang, phil, mode, db),
+        "full",
+        sutra_no,
+        lang=lang,
+        phil=phil,
+        mode=mode,
+    )
+
+
+@router.get(
+    "/{sutra_no}/related",
+    response_model=List[schemas.RelatedSutra],
+    dependencies=[Depends(corpus_etag)],
+)
+def get_related_sutras(
+    sutra_no: int,
+    k: int = Query(5, ge=1, le=50),
+    db: Session = Depends(get_db),
+):
+    """
+    Retrieve the `k` sutras most similar to a sutra by the words of their text,
+    meanings and interpretations (TF-IDF cosine similarity), most similar first.
+    """
+    related = related_sutras.related(db, sutra_no, k)
 
+    if related is None:
+        # Raises when the sutra does not exist
+        get_cached_sutra_or_404(sutra_no, db)
+        related = []
 
-@router.get("/{sutra_no}", response_model=schemas.SutraOut)
-def get_sutra(sutra_no: int, db: Session = Depends(get_db)):
-    return get_sutra_or_404(sutra_no, db)
+    return [{"sutra_no": number, "score": score} for number, score in related]
 
 
 @router.post("/", status_code=status.HTTP_201_CREATED)
@@ -41,9 +171,12 @@ def add_sutra(
     sutra = models.Sutra(**sutra.model_dump())
 
     db.add(sutra)
+    reindex_sutras(db, sutra.number)
     db.commit()
     db.refresh(sutra)
 
+    content_changed(sutra.number)
+
     return JSONResponse(
         status_code=status.HTTP_201_CREATED,
         content={"id": sutra.id},
@@ -62,8 +195,11 @@ def update_sutra(
     for key, value in sutra_update.model_dump().items():
         setattr(sutra, key, value)
 
+    reindex_sutras(db, sutra_no, sutra.number)
     db.commit()
 
+    content_changed(sutra_no, sutra.number)
+
 
 @router.delete("/{sutra_no}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_sutra(
@@ -72,6 +208,14 @@ def delete_sutra(
     current_admin: app_models.User = Depends(oauth2.get_current_admin),
 ):
     sutra = get_sutra_or_404(sutra_no, db)
+    stored = [(audio.file_path, audio.sha256) for audio in sutra.audios]
 
     db.delete(sutra)
+    reindex_sutras(db, sutra_no)
     db.commit()
+
+    content_changed(sutra_no)
+
+    # The sutra's audios are deleted with it
+    for file_path, sha256 in stored:
+        delete_unreferenced_file(db, file_path, sha256)
@@ -1,41 +1,55 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Response, status
 from sqlalchemy.orm import Session
 
 from app import models as app_models
 from app import oauth2
 from app.database import get_db
-from app.errors import conflict_error_response, not_found_error_response
+from app.errors import conflict_error_response
 from app.isha import models, schemas
+from app.isha.search import reindex_sutras
 from app.utils import Language
 
-from .utils import get_sutra_or_404
+from .utils import (
+    cached_response,
+    conflict_if_taken,
+    conflict_on_duplicate,
+    content_changed,
+    get_cached_sutra_or_404,
+    get_sutra_child_or_404,
+    sutra_etag,
+)
 
 router = APIRouter(prefix="/sutras", tags=["Transliterations"])
 
 
-def get_transliteration_or_404(sutra_id: int, language: Language, db: Session):
-    db_transliteration = (
-        db.query(models.Transliteration)
-        .filter(models.Transliteration.sutra_id == sutra_id)
-        .filter(models.Transliteration.language == language)
-        .first()
+def get_transliteration_or_404(sutra_no: int, language: Language, db: Session):
+    return get_sutra_child_or_404(
+        models.Transliteration,
+        sutra_no,
+        db,
+        models.Transliteration.language == language,
     )
 
-    if not db_transliteration:
-        not_found_error_response()
-
-    return db_transliteration
-
 
-@router.get("/{sutra_no}/transliteration", response_model=schemas.TransliterationOut)
+@router.get(
+    "/{sutra_no}/transliteration",
+    response_model=schemas.TransliterationOut,
+    dependencies=[Depends(sutra_etag)],
+)
 def get_transliteration(
-    sutra_no: int, lang: Language = Language.en, db: Session = Depends(get_db)
+    sutra_no: int,
+    response: Response,
+    lang: Language = Language.en,
+    db: Session = Depends(get_db),
 ):
-    sutra = get_sutra_or_404(sutra_no, db)
-
-    transliteration = get_transliteration_or_404(sutra.id, lang, db)
-
-    return transliteration
+    return cached_response(
+        response,
+        schemas.TransliterationOut,
+        lambda: get_transliteration_or_404(sutra_no, lang, db),
+        "transliteration",
+        sutra_no,
+        lang=lang,
+    )
 
 
 @router.post("/{sutra_no}/transliteration", status_code=status.HTTP_201_CREATED)
@@ -46,7 +60,7 @@ def add_transliteration(
     current_user: app_models.User = Depends(oauth2.get_current_user),
 ):
     # Retrieve sutra or raise 404 if not found
-    sutra = get_sutra_or_404(sutra_no, db)
+    sutra = get_cached_sutra_or_404(sutra_no, db)
 
     # Check if transliteration for the given sutra and language already exists
     db_transliteration = (
@@ -56,19 +70,23 @@ def add_transliteration(
         .first()
     )
 
+    detail = f"Transliteration for sutra {sutra_no} in language {transliteration.language} already exists!"
+
     if db_transliteration:
-        conflict_error_response(
-            f"Transliteration for sutra {sutra_no} in language {transliteration.language} already exists!"
-        )
+        conflict_error_response(detail)
 
     new_transliteration = models.Transliteration(
         **transliteration.model_dump(), sutra_id=sutra.id
     )
 
     db.add(new_transliteration)
-    db.commit()
+    with conflict_on_duplicate(db, detail):
+        reindex_sutras(db, sutra_no)
+        db.commit()
     db.refresh(new_transliteration)
 
+    content_changed(sutra_no)
+
     return {"id": new_transliteration.id}
 
 
@@ -80,17 +98,29 @@ def update_transliteration(
     db: Session = Depends(get_db),
     current_user: app_models.User = Depends(oauth2.get_current_user),
 ):
-    sutra = get_sutra_or_404(sutra_no, db)
-
-    db_transliteration = get_transliteration_or_404(sutra.id, lang, db)
+    db_transliteration = get_transliteration_or_404(sutra_no, lang, db)
+    detail = f"Transliteration for sutra {sutra_no} in language {transliteration.language} already exists!"
+
+    # Another transliteration may already use the new language
+    conflict_if_taken(
+        db,
+        models.Transliteration,
+        db_transliteration,
+        detail,
+        language=transliteration.language,
+    )
 
     # Update the fields
     for key, value in transliteration.model_dump().items():
         setattr(db_transliteration, key, value)
 
-    db.commit()
+    with conflict_on_duplicate(db, detail):
+        reindex_sutras(db, sutra_no)
+        db.commit()
     db.refresh(db_transliteration)
 
+    content_changed(sutra_no)
+
 
 @router.delete("/{sutra_no}/transliteration", status_code=status.HTTP_204_NO_CONTENT)
 def delete_transliteration(
@@ -99,8 +129,10 @@ def delete_transliteration(
     db: Session = Depends(get_db),
     current_admin: app_models.User = Depends(oauth2.get_current_admin),
 ):
-    sutra = get_sutra_or_404(sutra_no, db)
-    transliteration = get_transliteration_or_404(sutra.id, lang, db)
+    transliteration = get_transliteration_or_404(sutra_no, lang, db)
 
     db.delete(transliteration)
+    reindex_sutras(db, sutra_no)
     db.commit()
+
+    content_changed(sutra_no)
@@ -1,15 +1,323 @@
+from contextlib import contextmanager
+from email.utils import formatdate
+from typing import Any, Callable, Iterator, Optional, TypeVar
+
+from fastapi import Depends, Request, Response, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.errors import not_found_error_response
+from app.database import Base, get_async_db, get_db
+from app.errors import (
+    conflict_error_response,
+    error_response,
+    not_found_error_response,
+)
 from app.isha import models
+from app.isha.cache import (
+    CachedSutra,
+    content_version,
+    response_cache,
+    search_cache,
+    sutra_map,
+)
+from app.isha.serializers import dump_json
 
+ModelType = TypeVar("ModelType", bound=Base)
 
 
 def get_sutra_or_404(sutra_no: int, db: Session) -> models.Sutra:
     sutra = db.query(models.Sutra).filter(models.Sutra.number == sutra_no).first()
 
     if not sutra:
-        not_found_error_response()
+        not_found_error_response(f"Sutra {sutra_no} not found.")
 
     return sutra
 
+
+def get_cached_sutra_or_404(sutra_no: int, db: Session) -> CachedSutra:
+    """
+    Retrieve a sutra's id, number and text from the in-process sutra map.
+
+    Use this instead of `get_sutra_or_404` when the ORM object is not needed.
+    """
+    sutra = sutra_map.get(sutra_no, db)
+
+    if not sutra:
+        not_found_error_response(f"Sutra {sutra_no} not found.")
+
+    return sutra
+
+
+async def get_cached_sutra_or_404_async(sutra_no: int, db: AsyncSession) -> CachedSutra:
+    """
+    Async version of `get_cached_sutra_or_404`. The database is only queried when
+    the sutra map has to be loaded.
+    """
+    sutra = sutra_map.peek(sutra_no)
+
+    if not sutra:
+        sutra = await db.run_sync(lambda session: sutra_map.get(sutra_no, session))
+
+    if not sutra:
+        not_found_error_response(f"Sutra {sutra_no} not found.")
+
+    return sutra
+
+
+def get_sutra_child_or_404(
+    model: type[ModelType],
+    sutra_no: int,
+    db: Session,
+    *criteria,
+    detail: Optional[str] = None,
+) -> ModelType:
+    """
+    Retrieve a row of a sutra's child table (meaning, audio, ...) by sutra number.
+
+    The sutra id is resolved from the in-process sutra map, so only the child
+    table is queried. A missing sutra and a missing child get different 404
+    messages.
+
+    Parameters:
+        model: Child model with a `sutra_id` foreign key.
+        sutra_no (int): Number of the parent sutra.
+        db (Session): Database session.
+        *criteria: Additional filters on the child, e.g. language.
+        detail (str, optional): 404 message used when the sutra exists but the
+            child does not.
+    """
+    sutra = get_cached_sutra_or_404(sutra_no, db)
+
+    child = db.query(model).filter(model.sutra_id == sutra.id, *criteria).first()
+
+    if not child:
+        not_found_error_response(detail)
+
+    return child
+
+
+def conflict_if_taken(
+    db: Session, model: type[ModelType], child: ModelType, detail: str, **key: Any
+) -> None:
+    """
+    Answer 409 Conflict when another child of `child`'s sutra already has `key`
+    (e.g. `language="en"`), so updating `child` to `key` would duplicate it.
+
+    Call this before changing `child`.
+    """
+    taken = (
+        db.query(model.id)
+        .filter(
+            model.sutra_id == child.sutra_id,
+            model.id != child.id,
+            *(getattr(model, column) == value for column, value in key.items()),
+        )
+        .first()
+    )
+
+    if taken:
+        conflict_error_response(detail)
+
+
+# MySQL's ER_DUP_ENTRY
+MYSQL_DUPLICATE_ENTRY = 1062
+
+
+def is_unique_violation(error: IntegrityError) -> bool:
+    """Whether an integrity error comes from a unique index, on SQLite or MySQL."""
+    orig = error.orig
+
+    if getattr(orig, "sqlite_errorname", None) == "SQLITE_CONSTRAINT_UNIQUE":
+        return True
+
+    return bool(orig.args) and orig.args[0] == MYSQL_DUPLICATE_ENTRY
+
+
+@contextmanager
+def conflict_on_duplicate(db: Session, detail: str) -> Iterator[None]:
+    """
+    Answer 409 Conflict when a write in the block violates a unique index, e.g.
+    a child created by a concurrent request after the existence check. The
+    transaction is rolled back. Other integrity errors, e.g. foreign key
+    violations, are raised.
+    """
+    try:
+        yield
+    except IntegrityError as error:
+        db.rollback()
+        if not is_unique_violation(error):
+            raise
+        conflict_error_response(detail)
+
+
+def content_changed(*sutra_nos: int) -> None:
+    """
+    Notify in-process caches that content of one or more sutras was written.
+
+    Must be called by every handler after it commits a change to a sutra or one
+    of its children, which bumped the shared content version before committing.
+    The caches are keyed on that version, so expiring this process's copy of it
+    is enough for them to be reloaded; other workers see the write once their
+    copy expires.
+    """
+    content_version.expire()
+    # Stale from now on, dropped to free the memory
+    response_cache.invalidate_sutras(*sutra_nos)
+    # Stale after any write, see `SearchCache`; cleared to free the memory now
+    search_cache.clear()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    # "*" matches any current representation
+    if if_none_match.strip() == "*":
+        return True
+
+    # If-None-Match uses the weak comparison
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+    return etag in tags
+
+
+def check_not_modified(
+    request: Request,
+    response: Response,
+    sutra_no: Optional[int] = None,
+    variant: Optional[str] = None,
+    vary: Optional[str] = None,
+) -> None:
+    """
+    Set the ETag and Last-Modified headers of a GET response from the content
+    version, and answer 304 Not Modified when the client already holds it.
+
+    Uses the copy of the version synced by the calling dependency, so an
+    unchanged resource is answered before any other database access or
+    serialization. Routes with several representations, chosen by the `vary`
+    request header, pass the non-default one as `variant`, which gets its own
+    ETag.
+    """
+    etag, modified = content_version.get(sutra_no)
+    if variant:
+        etag = f'{etag[:-1]}-{variant}"'
+
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(modified, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+    if vary:
+        headers["Vary"] = vary
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        error_response(status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+
+
+def corpus_etag(
+    request: Request, response: Response, db: Session = Depends(get_db)
+) -> None:
+    """Dependency for GET routes whose response depends on the whole corpus."""
+    content_version.sync(db)
+    check_not_modified(request, response)
+
+
+def sutra_etag(
+    sutra_no: int, request: Request, response: Response, db: Session = Depends(get_db)
+) -> None:
+    """
+    Dependency for GET routes whose response depends on a single sutra, which
+    must exist for a conditional request to match.
+    """
+    get_cached_sutra_or_404(sutra_no, db)
+    check_not_modified(request, response, sutra_no)
+
+
+async def corpus_etag_async(
+    request: Request, response: Response, db: AsyncSession = Depends(get_async_db)
+) -> None:
+    """Async version of `corpus_etag`, reading the version with the async engine."""
+    if content_version.stale:
+        await db.run_sync(content_version.sync)
+    check_not_modified(request, response)
+
+
+async def sutra_etag_async(
+    sutra_no: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+) -> None:
+    """Async version of `sutra_etag`, reading the version with the async engine."""
+    if content_version.stale:
+        await db.run_sync(content_version.sync)
+    await get_cached_sutra_or_404_async(sutra_no, db)
+    check_not_modified(request, response, sutra_no)
+
+
+def cached_response(
+    response: Response,
+    schema: Any,
+    load: Callable[[], Any],
+    route: str,
+    sutra_no: Optional[int] = None,
+    lang: Optional[str] = None,
+    phil: Optional[str] = None,
+    mode: Optional[str] = None,
+) -> Response:
+    """
+    Serve a GET response from the response cache.
+
+    On a miss, `load` fetches the content from the database, which is serialized
+    as `schema` with orjson and cached under the route and its parameters. The
+    route's `response_model` still documents the response, but database rows are
+    trusted and not validated. Routes that depend on every sutra pass no
+    `sutra_no`.
+
+    The headers already set on `response`, e.g. by `sutra_etag`, are kept.
+    """
+    key = (route, sutra_no, lang, phil, mode)
+    etag, _ = content_version.get(sutra_no)
+    body = response_cache.get_response(key, etag)
+
+    if body is None:
+        body = dump_json(schema, load())
+        response_cache.set_response(key, etag, body)
+
+    return Response(
+        content=body, media_type="application/json", headers=response.headers
+    )
+
+
+async def cached_response_async(
+    response: Response,
+    schema: Any,
+    db: AsyncSession,
+    load: Callable[[Session], Any],
+    route: str,
+    sutra_no: Optional[int] = None,
+    lang: Optional[str] = None,
+    phil: Optional[str] = None,
+    mode: Optional[str] = None,
+) -> Response:
+    """
+    Async version of `cached_response`.
+
+    On a miss, the synchronous `load` is run with `AsyncSession.run_sync`, so the
+    sync loaders are reused while the database I/O runs on the async engine.
+    """
+    key = (route, sutra_no, lang, phil, mode)
+    etag, _ = content_version.get(sutra_no)
+    body = response_cache.get_response(key, etag)
+
+    if body is None:
+        # Serialize inside run_sync, where lazy loads are still possible
+        body = await db.run_sync(lambda session: dump_json(schema, load(session)))
+        response_cache.set_response(key, etag, body)
+
+    return Response(
+        content=body, media_type="application/json", headers=response.headers
+    )
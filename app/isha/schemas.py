@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 
-from app.utils import Language, Philosophy
-from typing import Optional
+from app.utils import ContentType, Language, Mode, Philosophy
+from typing import List, Optional
 
 
 class SutraBase(BaseModel):
@@ -22,6 +22,11 @@ class SutraListOut(BaseModel):
     number: int
 
 
+class RelatedSutra(BaseModel):
+    sutra_no: int
+    score: float  # Cosine similarity, from 0 to 1
+
+
 class SutraUpdate(SutraBase):
     pass
 
@@ -80,15 +85,38 @@ class InterpretationUpdate(InterpretationBase):
 
 class Audio(BaseModel):
     file_path: str
+    sha256: Optional[str] = None  # Hash of the file, for files stored by hash
+
+
+class Highlight(BaseModel):
+    start: int
+    end: int
 
 
 class Result(BaseModel):
-    text: str
+    snippet: str
+    offset: int  # Offset of the snippet in the full text
+    highlights: List[Highlight]  # Offsets of the matching words in the snippet
+    content_type: ContentType
+    score: float
     sutra_no: int
     mode: str | None
     lang: str | None
 
 
+class SearchResults(BaseModel):
+    results: List[Result]
+    next_cursor: Optional[str] = None
+
+
+class Suggestion(BaseModel):
+    word: str
+    frequency: int  # Occurrences in the searchable content
+
+
+class Suggestions(BaseModel):
+    suggestions: List[Suggestion]
+
 
 # Base model for common fields
 class BhashyamBase(BaseModel):
@@ -96,15 +124,43 @@ class BhashyamBase(BaseModel):
     text: str
     philosophy: Philosophy
 
+
 class BhashyamCreate(BhashyamBase):
     sutra_id: int = None  # Optional since the sutra_no in the path is used.
 
+
 class BhashyamUpdate(BaseModel):
     text: str = None
     philosophy: Philosophy = None
 
+
 class BhashyamOut(BhashyamBase):
     sutra_id: int
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+
+class SutraFullOut(SutraOut):
+    transliteration: Optional[TransliterationOut] = None
+    meaning: Optional[MeaningOut] = None
+    interpretation: Optional[InterpretationOut] = None
+    bhashyam: Optional[BhashyamOut] = None
+    audio: Optional[Audio] = None
+
+
+class AudioOut(Audio):
+    mode: Mode
+
+
+class CorpusSutra(SutraOut):
+    transliterations: List[TransliterationOut]
+    meanings: List[MeaningOut]
+    interpretations: List[InterpretationOut]
+    bhashyams: List[BhashyamOut]
+    audios: List[AudioOut]
+
+
+class CorpusOut(BaseModel):
+    version: str
+    sutras: List[CorpusSutra]
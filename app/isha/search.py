@@ -0,0 +1,469 @@
+import re
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import delete, func, insert, literal, literal_column, or_
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import column, table
+
+from app.config import settings
+from app.isha import models
+from app.isha.cache import content_version
+from app.isha.inverted_index import IndexedDocument, InvertedIndex, SearchFilters
+from app.isha.normalize import normalize_term
+from app.isha.transliterate import script_of, search_key
+from app.isha.vocabulary import CompletionsCache, vocabulary_cache
+from app.utils import ContentType
+
+# Version of the search documents. Bump it when `search_terms` or the way texts
+# are split into documents changes, so existing databases rebuild their search
+# documents on startup (see migrations.py).
+INDEX_VERSION = 4
+
+# Letters, digits, ZWNJ/ZWJ and the combining marks of Indic scripts (vowel
+# signs, virama, anusvara, ...), which Python's \w treats as separators. Dandas
+# are excluded.
+TOKEN_RE = re.compile(
+    r"(?:[^\W_]|[\u0300-\u036f\u0900-\u0963\u0966-\u096f\u0971-\u0dff"
+    r"\u1cd0-\u1cff\u200c\u200d\ua8e0-\ua8ff])+"
+)
+
+# Content tables indexed besides the sutras themselves
+CHILD_MODELS = {
+    ContentType.meaning: models.Meaning,
+    ContentType.transliteration: models.Transliteration,
+    ContentType.interpretation: models.Interpretation,
+    ContentType.bhashyam: models.Bhashyam,
+}
+
+# Content long enough to be split into passages, each indexed as a document
+PASSAGE_TYPES = {ContentType.bhashyam}
+
+fts = table("isha_search_fts", column("rowid"), column("terms"))
+
+# Number of indexed terms a misspelled query word is replaced with
+MAX_CORRECTIONS = 5
+
+# Length of the result snippets, and of the context kept before the first match
+SNIPPET_LENGTH = 200
+SNIPPET_CONTEXT = 50
+
+# Rows fetched at a time from the database cursor when streaming results
+STREAM_BATCH_SIZE = 100
+
+# Passages end at the first danda, full stop or blank line after this length
+PASSAGE_LENGTH = 500
+PASSAGE_BREAK_RE = re.compile(r"[\u0964\u0965.?!]+\s*|\n\s*\n\s*")
+
+
+def tokenize(text: str) -> list[tuple[str, int, int]]:
+    """
+    Split a text into its search terms, with the start and end offsets of the
+    words they come from.
+
+    Every word yields its normalized form and its script-neutral key (when they
+    differ), so a word is found whichever script the query is written in.
+    """
+    tokens = []
+
+    for token in TOKEN_RE.finditer(text):
+        word = token.group()
+        for term in dict.fromkeys([normalize_term(word), search_key(word)]):
+            if term:
+                tokens.append((term, token.start(), token.end()))
+
+    return tokens
+
+
+def search_terms(text: str) -> list[str]:
+    """Split a text into the terms it is indexed by."""
+    return [term for term, _, _ in tokenize(text)]
+
+
+def query_terms(query: str) -> list[tuple[str, ...]]:
+    """
+    Split a query into the alternative terms of each of its words. A document
+    matches a word when it contains one of the word's terms.
+    """
+    words: dict[int, tuple[str, ...]] = {}
+
+    for term, start, _ in tokenize(query):
+        words[start] = words.get(start, ()) + (term,)
+
+    return list(words.values())
+
+
+def split_passages(text: str) -> list[tuple[int, str]]:
+    """
+    Split a long text into passages of about `PASSAGE_LENGTH` characters, ending
+    at sentence or paragraph breaks.
+
+    Returns:
+        list[tuple[int, str]]: Every passage with its offset in `text`.
+    """
+    passages = []
+    start = 0
+
+    for passage_break in PASSAGE_BREAK_RE.finditer(text):
+        end = passage_break.end()
+        if end - start >= PASSAGE_LENGTH:
+            passages.append((start, text[start:end].rstrip()))
+            start = end
+
+    if start < len(text):
+        passages.append((start, text[start:]))
+
+    return passages
+
+
+# Optional in-process index answering searches without database access
+memory_index = InvertedIndex(tokenize)
+
+# Words of the search documents, completing the prefixes typed in a search box
+completions_cache = CompletionsCache(tokenize)
+
+
+def sync_memory_index(db: Session) -> InvertedIndex:
+    """
+    Return the in-memory index, loaded on first use and brought up to date with
+    the shared content version, so writes through any worker are searchable.
+    """
+    # Read the version before loading, see `CorpusSnapshots.get`
+    version = content_version.sync(db)
+    indexed = memory_index.version
+
+    if indexed is None:
+        memory_index.load(db, version)
+    elif indexed != version:
+        memory_index.load(db, version, content_version.changed_since(indexed))
+
+    return memory_index
+
+
+def make_document(
+    content_type: ContentType,
+    sutra_no: int,
+    text: str,
+    language: Optional[str] = None,
+    philosophy: Optional[str] = None,
+    offset: int = 0,
+) -> dict:
+    return {
+        "sutra_no": sutra_no,
+        "content_type": content_type.value,
+        "language": language,
+        "philosophy": philosophy,
+        "offset": offset,
+        "text": text,
+        "terms": " ".join(search_terms(text)),
+    }
+
+
+def load_documents(
+    db: Session, sutra_nos: Optional[Iterable[int]] = None
+) -> list[dict]:
+    """
+    Build the search documents of the given sutras (all sutras by default) from
+    the content tables, using one query per table. Bhashyams are split into
+    passages, see `split_passages`.
+    """
+    sutras = db.query(models.Sutra.number, models.Sutra.text)
+    if sutra_nos is not None:
+        sutras = sutras.filter(models.Sutra.number.in_(sutra_nos))
+
+    documents = [
+        make_document(ContentType.sutra, number, text) for number, text in sutras
+    ]
+
+    for content_type, model in CHILD_MODELS.items():
+        query = db.query(
+            models.Sutra.number,
+            model.text,
+            model.language,
+            getattr(model, "philosophy", literal(None)),
+        ).join(models.Sutra, model.sutra_id == models.Sutra.id)
+
+        if sutra_nos is not None:
+            query = query.filter(models.Sutra.number.in_(sutra_nos))
+
+        for number, text, language, philosophy in query:
+            passages = (
+                split_passages(text) if content_type in PASSAGE_TYPES else [(0, text)]
+            )
+            documents.extend(
+                make_document(
+                    content_type, number, passage, language, philosophy, offset
+                )
+                for offset, passage in passages
+            )
+
+    # Empty texts (e.g. missing Tamil transliterations) cannot match anything
+    return [document for document in documents if document["terms"]]
+
+
+def reindex_sutras(db: Session, *sutra_nos: int) -> None:
+    """
+    Rebuild the search documents of `sutra_nos` from the content tables.
+
+    Call this before committing a write to a sutra or its children, so the index
+    and the content version change in the same transaction. Pass both numbers
+    when a sutra is renumbered.
+    """
+    db.flush()
+    content_version.bump(db, *sutra_nos)
+
+    db.execute(
+        delete(models.SearchDocument).where(
+            models.SearchDocument.sutra_no.in_(sutra_nos)
+        )
+    )
+
+    documents = load_documents(db, sutra_nos)
+    if documents:
+        db.execute(insert(models.SearchDocument), documents)
+
+
+def rebuild_index(db: Session) -> int:
+    """
+    Rebuild every search document and record the index version.
+
+    Returns:
+        int: Number of documents indexed.
+    """
+    db.execute(delete(models.SearchDocument))
+    db.execute(delete(models.SearchIndexVersion))
+
+    documents = load_documents(db)
+    if documents:
+        db.execute(insert(models.SearchDocument), documents)
+
+    db.add(models.SearchIndexVersion(version=INDEX_VERSION))
+    # In-memory indexes reload the documents of the sutras whose version changed
+    content_version.bump(db, *{document["sutra_no"] for document in documents})
+
+    return len(documents)
+
+
+def filter_conditions(filters: Optional[SearchFilters]) -> list:
+    """SQL conditions on the search documents passing `filters`."""
+    if filters is None:
+        return []
+
+    conditions = [
+        getattr(models.SearchDocument, field) == value
+        for field, value in [
+            ("content_type", filters.content_type),
+            ("language", filters.language),
+            ("philosophy", filters.philosophy),
+        ]
+        if value is not None
+    ]
+    if filters.sutra_from is not None:
+        conditions.append(models.SearchDocument.sutra_no >= filters.sutra_from)
+    if filters.sutra_to is not None:
+        conditions.append(models.SearchDocument.sutra_no <= filters.sutra_to)
+
+    return conditions
+
+
+def ranked_query(
+    db: Session,
+    words: list[tuple[str, ...]],
+    filters: Optional[SearchFilters] = None,
+):
+    """
+    Query the documents matching every word, with one of its terms as a word or
+    a word prefix, with their relevance score (higher is better), best first.
+
+    SQLite ranks by FTS5's BM25 and MySQL by its FULLTEXT relevance. Other
+    databases have no full-text index, so their matches are scanned and unranked.
+    `filters` are applied in the same statement.
+    """
+    dialect = db.get_bind().dialect.name
+    restrictions = filter_conditions(filters)
+
+    if dialect == "sqlite":
+        expression = " AND ".join(
+            "(" + " OR ".join(f'"{term}"*' for term in terms) + ")" for terms in words
+        )
+        # bm25() is lower for better matches
+        score = -func.bm25(literal_column(fts.name))
+
+        return (
+            db.query(models.SearchDocument, score.label("score"))
+            .join(fts, fts.c.rowid == models.SearchDocument.id)
+            .filter(fts.c.terms.op("MATCH")(expression), *restrictions)
+            .order_by(score.desc(), models.SearchDocument.id)
+        )
+
+    if dialect in ("mysql", "mariadb"):
+        expression = " ".join(
+            "+(" + " ".join(f"{term}*" for term in terms) + ")" for terms in words
+        )
+        score = match(models.SearchDocument.terms, against=expression)
+        score = score.in_boolean_mode()
+
+        return (
+            db.query(models.SearchDocument, score.label("score"))
+            .filter(score, *restrictions)
+            .order_by(score.desc(), models.SearchDocument.id)
+        )
+
+    conditions = [
+        or_(*(models.SearchDocument.terms.like(f"%{term}%") for term in terms))
+        for terms in words
+    ]
+
+    return (
+        db.query(models.SearchDocument, literal(0.0).label("score"))
+        .filter(*conditions, *restrictions)
+        .order_by(models.SearchDocument.sutra_no, models.SearchDocument.id)
+    )
+
+
+def correct_words(
+    db: Session, words: list[tuple[str, ...]], threshold: float
+) -> list[tuple[str, ...]]:
+    """
+    Replace the query words that no indexed term starts with by the indexed terms
+    closest to them, so a misspelled query still finds its documents.
+
+    Parameters:
+        db (Session): Database session.
+        words (list[tuple[str, ...]]): Terms of the query words, see `query_terms`.
+        threshold (float): Minimum trigram similarity of a replacement, from 0 to 1.
+    """
+    vocabulary = vocabulary_cache.get(db)
+    corrected = []
+
+    for terms in words:
+        if any(vocabulary.has_prefix(term) for term in terms):
+            corrected.append(terms)
+            continue
+
+        similar = [
+            similar_term
+            for term in terms
+            for similar_term in vocabulary.similar(term, threshold, MAX_CORRECTIONS)
+        ]
+        corrected.append(tuple(dict.fromkeys(similar)) or terms)
+
+    return corrected
+
+
+def suggest(db: Session, prefix: str, limit: int) -> list[tuple[str, int]]:
+    """
+    Complete the last word of `prefix` to the most frequent words of the search
+    documents. A word typed in Latin letters completes to words in any script,
+    one typed in a Brahmic script only to words in that script.
+
+    Returns:
+        list[tuple[str, int]]: The words with their frequencies, most frequent
+            first.
+    """
+    words = query_terms(prefix)
+    if not words:
+        return []
+
+    script = script_of(TOKEN_RE.findall(prefix)[-1])
+    # The script-neutral key of a Brahmic prefix is lossy, e.g. "पू" and "पु"
+    # share it, so only its normalized term is completed
+    prefixes = words[-1][:1] if script else words[-1]
+
+    return completions_cache.get(db).complete(prefixes, limit, script)
+
+
+def search_documents(
+    db: Session,
+    words: list[tuple[str, ...]],
+    limit: Optional[int] = None,
+    offset: int = 0,
+    filters: Optional[SearchFilters] = None,
+) -> list[tuple[models.SearchDocument | IndexedDocument, float]]:
+    """
+    Find the search documents matching every word, ranked by relevance, from the
+    in-memory index when `isha_search_memory_index` is enabled.
+
+    Parameters:
+        db (Session): Database session.
+        words (list[tuple[str, ...]]): Terms of the query words, see `query_terms`.
+        limit (int, optional): Maximum number of documents to return.
+        offset (int): Number of best documents to skip.
+        filters (SearchFilters, optional): Only search the documents passing them.
+
+    Returns:
+        list: Documents with their scores, best first.
+    """
+    if not words:
+        return []
+
+    if settings.isha_search_memory_index:
+        return sync_memory_index(db).search(words, limit, offset, filters)
+
+    query = ranked_query(db, words, filters)
+
+    return [(document, score) for document, score in query.limit(limit).offset(offset)]
+
+
+def iter_documents(
+    db: Session,
+    words: list[tuple[str, ...]],
+    offset: int = 0,
+    filters: Optional[SearchFilters] = None,
+) -> Iterator[tuple[models.SearchDocument | IndexedDocument, float]]:
+    """
+    Like `search_documents` without a limit, but read the matches lazily from a
+    server-side cursor, `STREAM_BATCH_SIZE` rows at a time, so they can be sent
+    as they are found whatever their number.
+    """
+    if not words:
+        return
+
+    if settings.isha_search_memory_index:
+        yield from sync_memory_index(db).search(words, None, offset, filters)
+        return
+
+    query = ranked_query(db, words, filters).offset(offset)
+
+    for document, score in query.yield_per(STREAM_BATCH_SIZE):
+        yield document, score
+
+
+def make_snippet(text: str, words: list[tuple[str, ...]]) -> dict:
+    """
+    Cut the part of `text` around its first word matching one of the query words.
+
+    Returns:
+        dict: The snippet, its offset in `text` and the start and end offsets of
+            the matching words in the snippet.
+    """
+    prefixes = tuple(term for terms in words for term in terms)
+    matches = list(
+        dict.fromkeys(
+            (start, end)
+            for term, start, end in tokenize(text)
+            if term.startswith(prefixes)
+        )
+    )
+    first = matches[0][0] if matches else 0
+
+    # Start a few words before the first match, at a word boundary
+    start = max(first - SNIPPET_CONTEXT, 0)
+    if start > 0:
+        boundary = text.find(" ", start, first)
+        start = boundary + 1 if boundary >= 0 else first
+
+    end = start + SNIPPET_LENGTH
+    if end < len(text):
+        boundary = text.rfind(" ", first, end)
+        end = boundary if boundary > first else end
+
+    return {
+        "snippet": text[start:end],
+        "offset": start,
+        "highlights": [
+            {"start": match_start - start, "end": match_end - start}
+            for match_start, match_end in matches
+            if match_start >= start and match_end <= end
+        ],
+    }
@@ -0,0 +1,65 @@
+import types
+from functools import lru_cache
+from typing import Any, Callable, Union, get_args, get_origin
+
+import orjson
+from pydantic import BaseModel
+
+Dumper = Callable[[Any], Any]
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def _optional(dumper: Dumper) -> Dumper:
+    return lambda value: None if value is None else dumper(value)
+
+
+def _list(dumper: Dumper) -> Dumper:
+    return lambda values: [dumper(value) for value in values]
+
+
+def _model(fields: list[tuple[str, Dumper]]) -> Dumper:
+    def dump(obj: Any) -> dict:
+        if isinstance(obj, dict):
+            return {name: dumper(obj.get(name)) for name, dumper in fields}
+
+        return {name: dumper(getattr(obj, name)) for name, dumper in fields}
+
+    return dump
+
+
+@lru_cache
+def get_dumper(schema: Any) -> Dumper:
+    """
+    Build a function turning trusted data (ORM rows, result rows, dataclasses or
+    dicts) into the plain JSON-ready structure described by `schema`.
+
+    The field plan is computed once per schema from its annotations, so dumping
+    only reads attributes. Unlike pydantic validation, values are neither checked
+    nor coerced, so this must only be used on data read from our own database.
+    """
+    origin = get_origin(schema)
+
+    if origin in (Union, types.UnionType):
+        args = [arg for arg in get_args(schema) if arg is not type(None)]
+        return _optional(get_dumper(args[0])) if len(args) == 1 else _identity
+
+    if origin is list:
+        return _list(get_dumper(get_args(schema)[0]))
+
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        return _model(
+            [
+                (name, get_dumper(field.annotation))
+                for name, field in schema.model_fields.items()
+            ]
+        )
+
+    return _identity
+
+
+def dump_json(schema: Any, obj: Any) -> bytes:
+    """Serialize trusted data as `schema` with orjson, skipping validation."""
+    return orjson.dumps(get_dumper(schema)(obj))
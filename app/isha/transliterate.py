@@ -0,0 +1,170 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Optional
+
+# Unicode blocks of the Brahmic scripts we hold content in. They share the
+# layout of the Devanagari block, so one table of offsets converts all of them.
+SCRIPT_BASES = {
+    "devanagari": 0x0900,
+    "tamil": 0x0B80,
+    "telugu": 0x0C00,
+    "kannada": 0x0C80,
+}
+
+# SLP1 of the independent vowels, by offset in a block
+VOWELS = {
+    0x05: "a", 0x06: "A", 0x07: "i", 0x08: "I", 0x09: "u", 0x0A: "U",
+    0x0B: "f", 0x0C: "x", 0x0E: "e", 0x0F: "e", 0x10: "E", 0x12: "o",
+    0x13: "o", 0x14: "O", 0x60: "F", 0x61: "X",
+}  # fmt: skip
+
+# SLP1 of the consonants, which carry an inherent "a"
+CONSONANTS = {
+    0x15: "k", 0x16: "K", 0x17: "g", 0x18: "G", 0x19: "N",
+    0x1A: "c", 0x1B: "C", 0x1C: "j", 0x1D: "J", 0x1E: "Y",
+    0x1F: "w", 0x20: "W", 0x21: "q", 0x22: "Q", 0x23: "R",
+    0x24: "t", 0x25: "T", 0x26: "d", 0x27: "D", 0x28: "n", 0x29: "n",
+    0x2A: "p", 0x2B: "P", 0x2C: "b", 0x2D: "B", 0x2E: "m",
+    0x2F: "y", 0x30: "r", 0x31: "r", 0x32: "l", 0x33: "L", 0x34: "L", 0x35: "v",
+    0x36: "S", 0x37: "z", 0x38: "s", 0x39: "h",
+    # Consonants with nukta
+    0x58: "k", 0x59: "K", 0x5A: "g", 0x5B: "j", 0x5C: "q", 0x5D: "Q",
+    0x5E: "P", 0x5F: "y",
+}  # fmt: skip
+
+# SLP1 of the dependent vowel signs, which replace the inherent "a"
+VOWEL_SIGNS = {
+    0x3E: "A", 0x3F: "i", 0x40: "I", 0x41: "u", 0x42: "U", 0x43: "f",
+    0x44: "F", 0x46: "e", 0x47: "e", 0x48: "E", 0x4A: "o", 0x4B: "o",
+    0x4C: "O", 0x62: "x", 0x63: "X",
+}  # fmt: skip
+
+# Signs written after a syllable
+SIGNS = {0x01: "~", 0x02: "M", 0x03: "H", 0x50: "oM"}
+
+VIRAMA = 0x4D
+
+# IAST to SLP1. Letters outside IAST (English words in meanings) are mapped to
+# their nearest sound, so every Latin word gets a key.
+IAST = {
+    "ai": "E", "au": "O",
+    "kh": "K", "gh": "G", "ch": "C", "jh": "J", "ṭh": "W", "ḍh": "Q",
+    "th": "T", "dh": "D", "ph": "P", "bh": "B",
+    "a": "a", "ā": "A", "i": "i", "ī": "I", "u": "u", "ū": "U",
+    "ṛ": "f", "ṝ": "F", "ḷ": "x", "ḹ": "X", "e": "e", "o": "o",
+    "ṃ": "M", "ṁ": "M", "ḥ": "H",
+    "k": "k", "g": "g", "ṅ": "N", "c": "c", "j": "j", "ñ": "Y",
+    "ṭ": "w", "ḍ": "q", "ṇ": "R", "t": "t", "d": "d", "n": "n",
+    "p": "p", "b": "b", "m": "m", "y": "y", "r": "r", "l": "l", "v": "v",
+    "ś": "S", "ṣ": "z", "s": "s", "h": "h",
+    "f": "P", "q": "k", "w": "v", "x": "kz", "z": "j",
+}  # fmt: skip
+
+IAST_RE = re.compile("|".join(sorted(IAST, key=len, reverse=True)))
+
+# Characters mapped by the Brahmic tables, by code point
+BRAHMIC = {}
+for _base in SCRIPT_BASES.values():
+    for _table, _kind in [
+        (VOWELS, "vowel"),
+        (CONSONANTS, "consonant"),
+        (VOWEL_SIGNS, "sign"),
+        (SIGNS, "after"),
+    ]:
+        BRAHMIC.update(
+            {chr(_base + offset): (_kind, slp1) for offset, slp1 in _table.items()}
+        )
+    BRAHMIC[chr(_base + VIRAMA)] = ("virama", "")
+    BRAHMIC.update(
+        {chr(_base + 0x66 + digit): ("after", str(digit)) for digit in range(10)}
+    )
+
+
+def to_slp1(text: str) -> str:
+    """
+    Transliterate Devanagari, Kannada, Telugu, Tamil or IAST text to SLP1.
+
+    Other characters (accents, ZWJ, punctuation, ...) are dropped. Tamil script
+    does not mark aspiration or voicing, so its consonants map to the unvoiced,
+    unaspirated sounds.
+    """
+    text = unicodedata.normalize("NFC", text.casefold())
+    output = []
+    # Whether the last character was a consonant still carrying its inherent "a"
+    inherent = False
+
+    position = 0
+    while position < len(text):
+        char = text[position]
+        mapped = BRAHMIC.get(char)
+
+        if mapped:
+            kind, slp1 = mapped
+            if kind in ("sign", "virama") and inherent:
+                output.pop()
+            if kind == "consonant":
+                output += [slp1, "a"]
+            elif kind != "sign" or inherent:
+                output.append(slp1)
+            inherent = kind == "consonant"
+            position += 1
+            continue
+
+        latin = IAST_RE.match(text, position)
+        if latin:
+            output.append(IAST[latin.group()])
+            position = latin.end()
+            inherent = False
+            continue
+
+        # Accents and ZWJ/ZWNJ may sit between a consonant and its vowel sign
+        if not unicodedata.category(char).startswith(("M", "Cf")):
+            inherent = False
+        position += 1
+
+    return "".join(output)
+
+
+# A nasal before a stop of any class and a final anusvara or candrabindu are
+# written interchangeably with anusvara
+NASAL_RE = re.compile(r"[NYRnm~](?=[kKgGcCjJwWqQtTdDpPbB])|[~M]$")
+
+# SLP1 letters folded to lowercase ASCII. SLP1 tells letters apart by case (a
+# and A), which the FTS5 and MySQL full-text indexes ignore, so keys merge vowel
+# length and retroflexion instead, and spell aspirates and sibilants with h.
+KEY_LETTERS = str.maketrans(
+    {
+        "A": "a", "I": "i", "U": "u", "f": "r", "F": "r", "x": "l", "X": "l",
+        "E": "ai", "O": "au", "M": "m", "H": "h", "~": "m",
+        "K": "kh", "G": "gh", "N": "n", "C": "ch", "J": "jh", "Y": "n",
+        "w": "t", "W": "th", "q": "d", "Q": "dh", "R": "n",
+        "T": "th", "D": "dh", "P": "ph", "B": "bh",
+        "L": "l", "S": "sh", "z": "sh",
+    }
+)  # fmt: skip
+
+
+def script_of(word: str) -> Optional[str]:
+    """
+    Name of the Brahmic script `word` is written in, a key of `SCRIPT_BASES`, or
+    None for Latin and other scripts.
+    """
+    for char in word:
+        for script, base in SCRIPT_BASES.items():
+            if base <= ord(char) < base + 0x80:
+                return script
+
+    return None
+
+
+@lru_cache(maxsize=65536)
+def search_key(word: str) -> str:
+    """
+    Script-neutral key of a word: its SLP1 transliteration folded to lowercase
+    ASCII, with vowel length, retroflexion and nasal spelling variants merged.
+
+    The same word written in Devanagari, Kannada, Telugu or IAST, or typed in
+    plain ASCII ("ishavasyam"), gets the same key.
+    """
+    return NASAL_RE.sub("m", to_slp1(word)).translate(KEY_LETTERS)
@@ -0,0 +1,275 @@
+import heapq
+import threading
+from bisect import bisect_left
+from collections import Counter
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from app.isha import models
+from app.isha.cache import content_version
+from app.isha.transliterate import script_of
+
+
+def trigrams(term: str) -> set[str]:
+    """Trigrams of a term, padded so that its start and end weigh more."""
+    padded = f"  {term} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between two terms."""
+    previous = list(range(len(b) + 1))
+
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        previous = current
+
+    return previous[-1]
+
+
+class Vocabulary:
+    """
+    Every term of the search index with its frequency, sorted, and a trigram
+    index over the terms.
+    """
+
+    def __init__(self, frequencies: Counter):
+        self.terms = sorted(frequencies)
+        self.frequencies = [frequencies[term] for term in self.terms]
+        self._trigrams: dict[str, list[int]] = {}
+        self._trigram_counts: list[int] = []
+
+        for position, term in enumerate(self.terms):
+            term_trigrams = trigrams(term)
+            self._trigram_counts.append(len(term_trigrams))
+            for trigram in term_trigrams:
+                self._trigrams.setdefault(trigram, []).append(position)
+
+    @classmethod
+    def load(cls, db: Session) -> "Vocabulary":
+        frequencies = Counter()
+
+        for (terms,) in db.query(models.SearchDocument.terms):
+            frequencies.update(terms.split())
+
+        return cls(frequencies)
+
+    def has_prefix(self, prefix: str) -> bool:
+        position = bisect_left(self.terms, prefix)
+        return position < len(self.terms) and self.terms[position].startswith(prefix)
+
+    def similar(self, term: str, threshold: float, limit: int) -> list[str]:
+        """
+        Find the terms whose trigram similarity to `term` is at least `threshold`,
+        closest first by edit distance, then similarity and frequency.
+
+        The similarity is the share of trigrams the terms have in common, from 0
+        to 1, as in PostgreSQL's pg_trgm.
+        """
+        term_trigrams = trigrams(term)
+        candidates = Counter()
+
+        for trigram in term_trigrams:
+            candidates.update(self._trigrams.get(trigram, ()))
+
+        matches = []
+        for position, shared in candidates.items():
+            total = len(term_trigrams) + self._trigram_counts[position] - shared
+            score = shared / total
+
+            if score >= threshold:
+                candidate = self.terms[position]
+                matches.append(
+                    (
+                        edit_distance(term, candidate),
+                        -score,
+                        -self.frequencies[position],
+                        candidate,
+                    )
+                )
+
+        return [match[-1] for match in sorted(matches)[:limit]]
+
+
+class Completions:
+    """
+    The words of the search documents with their frequencies, and a sorted array
+    of their search terms to complete word prefixes from.
+
+    A word is shown as its most frequent spelling, and completes any prefix of
+    one of its terms, so "isha" and "ईश" both complete to ईशा. Prefixes in a
+    Brahmic script can be restricted to the words shown in it, so "ई" does not
+    complete to "is", whose script-neutral key it shares.
+    """
+
+    def __init__(self, words: dict[str, Counter], terms: dict[str, set[str]]):
+        self.words = [spellings.most_common(1)[0][0] for spellings in words.values()]
+        self.frequencies = [spellings.total() for spellings in words.values()]
+        self.scripts = [script_of(word) for word in self.words]
+
+        positions = {word: position for position, word in enumerate(words)}
+        keys = sorted(
+            (term, positions[word])
+            for word, word_terms in terms.items()
+            for term in word_terms
+        )
+        self._terms = [term for term, _ in keys]
+        self._positions = [position for _, position in keys]
+
+    def complete(
+        self, prefixes: tuple[str, ...], limit: int, script: Optional[str] = None
+    ) -> list[tuple[str, int]]:
+        """
+        The `limit` most frequent words with a term starting with one of
+        `prefixes`, with their frequencies. Only words shown in `script` are
+        completed when it is given, see `script_of`.
+        """
+        positions = set()
+
+        for prefix in prefixes:
+            index = bisect_left(self._terms, prefix)
+            while index < len(self._terms) and self._terms[index].startswith(prefix):
+                position = self._positions[index]
+                if script is None or self.scripts[position] == script:
+                    positions.add(position)
+                index += 1
+
+        best = heapq.nsmallest(
+            limit,
+            positions,
+            key=lambda position: (-self.frequencies[position], self.words[position]),
+        )
+        return [(self.words[position], self.frequencies[position]) for position in best]
+
+
+class CompletionsCache:
+    """
+    The `Completions` of the search documents, kept up to date like the
+    in-memory search index: after the content changes, only the documents of the
+    sutras written since are tokenized again.
+    """
+
+    def __init__(self, tokenize: Callable[[str], list[tuple[str, int, int]]]):
+        self._tokenize = tokenize
+        self._lock = threading.Lock()
+        self._completions: Optional[tuple[int, Completions]] = None
+        # Spellings of each word, keyed by its first (normalized) term, in all
+        # documents and in those of each sutra
+        self._words: dict[str, Counter] = {}
+        self._sutras: dict[int, dict[str, Counter]] = {}
+        # Terms of each spelling
+        self._terms: dict[str, tuple[str, ...]] = {}
+
+    def get(self, db: Session) -> Completions:
+        # Read the version before loading, see `CorpusSnapshots.get`
+        version = content_version.sync(db)
+
+        cached = self._completions
+        if cached and cached[0] == version:
+            return cached[1]
+
+        with self._lock:
+            cached = self._completions
+            if cached and cached[0] == version:
+                return cached[1]
+
+            if cached is None:
+                self._load(db)
+            else:
+                self._load(db, content_version.changed_since(cached[0]))
+
+            terms = {
+                word: {term for spelling in spellings for term in self._terms[spelling]}
+                for word, spellings in self._words.items()
+            }
+            completions = Completions(self._words, terms)
+            self._completions = (version, completions)
+
+        return completions
+
+    def clear(self) -> None:
+        with self._lock:
+            self._completions = None
+            self._words = {}
+            self._sutras = {}
+            self._terms = {}
+
+    def _load(self, db: Session, sutra_nos: Optional[set[int]] = None) -> None:
+        query = db.query(models.SearchDocument.sutra_no, models.SearchDocument.text)
+        if sutra_nos is not None:
+            query = query.filter(models.SearchDocument.sutra_no.in_(sutra_nos))
+
+        rows = query.all()
+
+        if sutra_nos is None:
+            self._words, self._sutras, self._terms = {}, {}, {}
+        else:
+            for sutra_no in sutra_nos:
+                for word, spellings in self._sutras.pop(sutra_no, {}).items():
+                    self._remove(word, spellings)
+
+        for sutra_no, text in rows:
+            sutra_words = self._sutras.setdefault(sutra_no, {})
+            spans: dict[tuple[int, int], list[str]] = {}
+            for term, start, end in self._tokenize(text):
+                spans.setdefault((start, end), []).append(term)
+
+            for (start, end), word_terms in spans.items():
+                word, spelling = word_terms[0], text[start:end]
+                sutra_words.setdefault(word, Counter())[spelling] += 1
+                self._words.setdefault(word, Counter())[spelling] += 1
+                self._terms[spelling] = tuple(word_terms)
+
+    def _remove(self, word: str, spellings: Counter) -> None:
+        counts = self._words[word]
+        counts.subtract(spellings)
+
+        for spelling in spellings:
+            if counts[spelling] <= 0:
+                del counts[spelling]
+                del self._terms[spelling]
+
+        if not counts:
+            del self._words[word]
+
+
+class VocabularyCache:
+    """
+    A structure built from the search documents, such as their vocabulary,
+    rebuilt after the content changes.
+    """
+
+    def __init__(self, load: Callable[[Session], object] = Vocabulary.load):
+        self._load = load
+        self._lock = threading.Lock()
+        self._vocabulary: Optional[tuple[int, object]] = None
+
+    def get(self, db: Session):
+        # Read the version before loading, see `CorpusSnapshots.get`
+        version = content_version.sync(db)
+
+        cached = self._vocabulary
+        if cached and cached[0] == version:
+            return cached[1]
+
+        with self._lock:
+            cached = self._vocabulary
+            if cached and cached[0] == version:
+                return cached[1]
+
+            vocabulary = self._load(db)
+            self._vocabulary = (version, vocabulary)
+
+        return vocabulary
+
+
+vocabulary_cache = VocabularyCache()
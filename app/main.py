@@ -1,16 +1,48 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.config import settings
+from app.database import SessionLocal
+from app.isha.cache import sutra_map
 from app.isha.main import isha
-from app.routers import auth, projects, users
+from app.isha.routers.audio import (
+    AUDIO_STORE_DIR,
+    STATIC_AUDIO_DIR,
+    ImmutableStaticFiles,
+)
+from app.isha.search import completions_cache, sync_memory_index
+from app.routers import admin, auth, projects, users
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up the in-process sutra map so the first requests skip the lookup query,
+    # and the search completions so the first keystroke skips tokenizing the corpus
+    with SessionLocal() as db:
+        sutra_map.load(db)
+        completions_cache.get(db)
+
+        if settings.isha_search_memory_index:
+            sync_memory_index(db)
+
+    yield
+
 
 app = FastAPI(
+    lifespan=lifespan,
     docs_url=None if settings.env == "production" else "/docs",
     redoc_url=None if settings.env == "production" else "/redoc",
 )
 
+# Audio stored by content hash never changes, so it may be cached forever
+app.mount(
+    f"/{(STATIC_AUDIO_DIR / AUDIO_STORE_DIR).as_posix()}",
+    ImmutableStaticFiles(directory=STATIC_AUDIO_DIR / AUDIO_STORE_DIR),
+    name="isha_audio",
+)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 origins = settings.cors_origins.split(",")
@@ -32,5 +64,6 @@ def health_check():
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(projects.router)
+app.include_router(admin.router)
 
 app.mount("/isha", isha)
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+
+from app import models, oauth2
+from app.database import async_engine, engine
+from app.isha.cache import response_cache, search_cache
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/cache")
+def get_cache_stats(current_admin: models.User = Depends(oauth2.get_current_admin)):
+    return {
+        "isha_responses": response_cache.stats(),
+        "isha_search": search_cache.stats(),
+    }
+
+
+@router.get("/pool")
+def get_pool_stats(current_admin: models.User = Depends(oauth2.get_current_admin)):
+    return {
+        "sync": engine.pool.stats(),
+        "async": async_engine.pool.stats() if async_engine else None,
+    }
@@ -39,3 +39,11 @@ class Mode(str, Enum):
     chant = "chant"  # Chant
     teachMe = "teach_me"  # Teach Me
     learnMore = "learn_more"  # Learn More
+
+
+class ContentType(str, Enum):
+    sutra = "sutra"  # Sutra
+    meaning = "meaning"  # Meaning
+    transliteration = "transliteration"  # Transliteration
+    interpretation = "interpretation"  # Interpretation
+    bhashyam = "bhashyam"  # Bhashyam
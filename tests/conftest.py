@@ -7,7 +7,10 @@ from sqlalchemy.orm import sessionmaker
 from app import utils
 from app.config import settings
 from app.database import Base, get_db
+from app.isha.cache import content_version, response_cache, search_cache, sutra_map
 from app.isha.main import isha
+from app.isha.related import related_sutras
+from app.isha.search import completions_cache, memory_index
 from app.main import app
 from app.models import User
 from app.oauth2 import create_access_token
@@ -24,6 +27,15 @@ def session():
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
 
+    # In-process caches must not outlive the database they were loaded from
+    sutra_map.invalidate()
+    content_version.clear()
+    response_cache.clear()
+    search_cache.clear()
+    memory_index.clear()
+    completions_cache.clear()
+    related_sutras.clear()
+
     db = TestingSessionLocal()
 
     try:
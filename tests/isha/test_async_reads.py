@@ -0,0 +1,55 @@
+import pytest
+from fastapi import FastAPI, status
+from fastapi.testclient import TestClient
+from sqlalchemy import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.database import get_async_db
+from app.isha import models
+from app.isha.routers import async_reads
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+def async_client(session):
+    url = make_url(settings.test_db_url)
+
+    if url.get_backend_name() != "sqlite":
+        pytest.skip("Async reads are tested against SQLite only")
+
+    engine = create_async_engine(url.set(drivername="sqlite+aiosqlite"))
+    AsyncTestingSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(async_reads.router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+
+    yield TestClient(app)
+
+
+def test_get_meaning_async(session, async_client):
+    sutra = models.Sutra(number=1, text="Test Sutra text")
+    sutra.meanings.append(models.Meaning(language="en", text="Test meaning text"))
+    session.add(sutra)
+    session.commit()
+
+    response = async_client.get("/sutras/1/meaning?lang=en")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"id": 1, "language": "en", "text": "Test meaning text"}
+
+    response = async_client.get("/sutras/1")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"id": 1, "number": 1, "text": "Test Sutra text"}
+
+    response = async_client.get("/sutras/1/meaning?lang=kn")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = async_client.get("/sutras/2/meaning?lang=en")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json()["detail"] == "Sutra 2 not found."
@@ -0,0 +1,216 @@
+import contextlib
+import hashlib
+import io
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI, UploadFile, status
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.isha import models
+from app.isha.routers import audio
+
+
+@pytest.fixture(autouse=True)
+def audio_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(audio, "STATIC_AUDIO_DIR", tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def sutra(authorized_admin):
+    response = authorized_admin.post(
+        "/isha/sutras", json={"number": 1, "text": "Sutra"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+
+def test_upload_audio(authorized_admin, sutra, audio_dir, monkeypatch):
+    # Several chunks
+    monkeypatch.setattr(audio, "UPLOAD_CHUNK_SIZE", 4)
+    content = b"chant recording"
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    response = authorized_admin.post(
+        "/isha/sutras/1/audio?mode=chant",
+        files={"file": ("chant.MP3", content, "audio/mpeg")},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    file_path = audio_dir / "audio" / sha256[:2] / sha256[2:4] / f"{sha256}.mp3"
+    # A URL path under the audio mount, whatever the OS's path separator
+    assert response.json()["audio"]["file_path"] == file_path.as_posix()
+    assert "\\" not in response.json()["audio"]["file_path"]
+    assert response.json()["audio"]["sha256"] == sha256
+    assert file_path.read_bytes() == content
+
+    response = authorized_admin.get("/isha/sutras/1/audio?mode=chant")
+    assert response.json() == {"file_path": file_path.as_posix(), "sha256": sha256}
+
+    response = authorized_admin.put(
+        "/isha/sutras/1/audio?mode=chant",
+        files={"file": ("chant.mp3", b"new recording", "audio/mpeg")},
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    new_sha256 = hashlib.sha256(b"new recording").hexdigest()
+    response = authorized_admin.get("/isha/sutras/1/audio?mode=chant")
+    new_file_path = Path(response.json()["file_path"])
+    assert new_file_path.name == f"{new_sha256}.mp3"
+    assert new_file_path.read_bytes() == b"new recording"
+
+    # The previous file is no longer referenced
+    assert not file_path.exists()
+    assert not list((audio_dir / "audio").glob(".*"))
+
+    response = authorized_admin.delete("/isha/sutras/1")
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert not new_file_path.exists()
+
+
+def test_upload_audio_dedupes(authorized_admin, sutra, audio_dir):
+    # By content, whatever the extension
+    for mode, filename in [("chant", "chant.mp3"), ("teach_me", "teach.m4a")]:
+        response = authorized_admin.post(
+            f"/isha/sutras/1/audio?mode={mode}",
+            files={"file": (filename, b"same recording", "audio/mpeg")},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    paths = {
+        authorized_admin.get(f"/isha/sutras/1/audio?mode={mode}").json()["file_path"]
+        for mode in ["chant", "teach_me"]
+    }
+    assert len(paths) == 1
+    assert len([path for path in audio_dir.rglob("*") if path.is_file()]) == 1
+
+    # The file is deleted with the last audio referencing it
+    response = authorized_admin.delete("/isha/sutras/1/audio?mode=chant")
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert Path(paths.pop()).exists()
+
+    response = authorized_admin.delete("/isha/sutras/1/audio?mode=teach_me")
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert [path for path in audio_dir.rglob("*") if path.is_file()] == []
+
+
+def test_store_upload_restores_deleted_file(authorized_admin, sutra, audio_dir):
+    response = authorized_admin.post(
+        "/isha/sutras/1/audio?mode=chant",
+        files={"file": ("chant.mp3", b"same recording", "audio/mpeg")},
+    )
+    file_path = Path(response.json()["audio"]["file_path"])
+
+    # A concurrent request deletes the file before the new reference commits
+    upload = UploadFile(io.BytesIO(b"same recording"), filename="teach.mp3")
+    with audio.store_upload(upload) as (stored_path, _):
+        assert stored_path == file_path
+        file_path.unlink()
+
+    assert file_path.read_bytes() == b"same recording"
+    assert not list((audio_dir / "audio").glob(".*"))
+
+
+def test_store_upload_failure_leaves_no_file(audio_dir):
+    upload = UploadFile(io.BytesIO(b"recording"), filename="chant.mp3")
+    with pytest.raises(RuntimeError):
+        with audio.store_upload(upload):
+            raise RuntimeError
+
+    assert [path for path in audio_dir.rglob("*") if path.is_file()] == []
+
+
+def test_upload_audio_concurrently(
+    authorized_admin, session, sutra, audio_dir, monkeypatch
+):
+    store_upload = audio.store_upload
+
+    @contextlib.contextmanager
+    def store_after_concurrent_upload(file):
+        # Another request creates the audio after the existence check
+        with Session(bind=session.get_bind()) as other:
+            sutra_id = other.query(models.Sutra.id).scalar()
+            other.add(
+                models.Audio(file_path="other.mp3", sutra_id=sutra_id, mode="chant")
+            )
+            other.commit()
+
+        with store_upload(file) as stored:
+            yield stored
+
+    monkeypatch.setattr(audio, "store_upload", store_after_concurrent_upload)
+
+    response = authorized_admin.post(
+        "/isha/sutras/1/audio?mode=chant",
+        files={"file": ("chant.mp3", b"chant recording", "audio/mpeg")},
+    )
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert [path for path in audio_dir.rglob("*") if path.is_file()] == []
+
+
+def test_stored_audio_is_immutable(tmp_path):
+    (tmp_path / "ab.mp3").write_bytes(b"recording")
+
+    app = FastAPI()
+    app.mount("/audio", audio.ImmutableStaticFiles(directory=tmp_path))
+
+    response = TestClient(app).get("/audio/ab.mp3")
+    assert response.status_code == status.HTTP_200_OK
+    assert "immutable" in response.headers["cache-control"]
+
+
+def test_upload_audio_too_large(authorized_admin, sutra, audio_dir, monkeypatch):
+    monkeypatch.setattr(settings, "isha_audio_max_bytes", 10)
+
+    response = authorized_admin.post(
+        "/isha/sutras/1/audio?mode=chant",
+        files={"file": ("chant.mp3", b"x" * 11, "audio/mpeg")},
+    )
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+    assert [path for path in audio_dir.rglob("*") if path.is_file()] == []
+
+    response = authorized_admin.get("/isha/sutras/1/audio?mode=chant")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_stream_audio(client, authorized_admin, sutra):
+    content = bytes(range(256)) * 4
+
+    response = authorized_admin.post(
+        "/isha/sutras/1/audio?mode=chant",
+        files={"file": ("chant.mp3", content, "audio/mpeg")},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.get("/isha/sutras/1/audio/stream?mode=chant")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.content == content
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.headers["content-type"] == "audio/mpeg"
+    assert response.headers["cache-control"].startswith("public, max-age=")
+    etag = response.headers["etag"]
+    assert etag == f'"{hashlib.sha256(content).hexdigest()}"'
+
+    response = client.get(
+        "/isha/sutras/1/audio/stream?mode=chant", headers={"Range": "bytes=100-199"}
+    )
+    assert response.status_code == status.HTTP_206_PARTIAL_CONTENT
+    assert response.content == content[100:200]
+    assert response.headers["content-range"] == f"bytes 100-199/{len(content)}"
+
+    response = client.get(
+        "/isha/sutras/1/audio/stream?mode=chant", headers={"Range": "bytes=5000-"}
+    )
+    assert response.status_code == status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+
+    response = client.get(
+        "/isha/sutras/1/audio/stream?mode=chant", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["etag"] == etag
+
+    response = client.get("/isha/sutras/1/audio/stream?mode=teach_me")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -237,3 +237,23 @@ def test_delete_bhashyam(
         print(response.json())
 
     assert response.status_code == expected_status
+
+
+def test_update_bhashyam_to_existing_philosophy(
+    authorized_admin, sutra_data, bhashyam_data
+):
+    response = authorized_admin.post("/isha/sutras", json=sutra_data)
+    assert response.status_code == status.HTTP_201_CREATED
+
+    for philosophy in ("adv", "dva"):
+        response = authorized_admin.post(
+            f"/isha/sutras/{sutra_data['number']}/bhashyam",
+            json={**bhashyam_data, "philosophy": philosophy},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    response = authorized_admin.put(
+        f"/isha/sutras/{sutra_data['number']}/bhashyam?lang=sa&phil=dva",
+        json={"philosophy": "adv"},
+    )
+    assert response.status_code == status.HTTP_409_CONFLICT
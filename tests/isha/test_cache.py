@@ -0,0 +1,28 @@
+from app.isha.cache import LRUCache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_bytes=10)
+
+    cache.set("a", b"aaaa", 4)
+    cache.set("b", b"bbbb", 4)
+    assert cache.get("a") == b"aaaa"
+
+    # "b" is now the least recently used entry
+    cache.set("c", b"cccc", 4)
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.get("c") == b"cccc"
+    assert cache.stats()["size_bytes"] == 8
+
+    # Values larger than the cache are not stored
+    cache.set("d", b"d" * 11, 11)
+    assert cache.get("d") is None
+
+
+def test_lru_cache_rejects_invalid_entries():
+    cache = LRUCache(max_bytes=10)
+    cache.set("a", ("v1", b"body"), 4)
+
+    assert cache.get("a", is_valid=lambda entry: entry[0] == "v2") is None
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,52 @@
+from fastapi import status
+
+
+def test_get_corpus(client, authorized_admin):
+    response = authorized_admin.post(
+        "/isha/sutras", json={"number": 1, "text": "Sutra 1"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    for language in ["en", "kn"]:
+        response = authorized_admin.post(
+            "/isha/sutras/1/meaning",
+            json={"language": language, "text": f"Meaning in {language}"},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.get("/isha/corpus?lang=en")
+    assert response.status_code == status.HTTP_200_OK
+
+    corpus = response.json()
+    etag = response.headers["etag"]
+
+    response = client.get("/isha/corpus?lang=en", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert corpus["sutras"] == [
+        {
+            "id": 1,
+            "number": 1,
+            "text": "Sutra 1",
+            "transliterations": [],
+            "meanings": [{"id": 1, "language": "en", "text": "Meaning in en"}],
+            "interpretations": [],
+            "bhashyams": [],
+            "audios": [],
+        }
+    ]
+
+    # A write rebuilds the snapshot with a new version
+    response = authorized_admin.put(
+        "/isha/sutras/1/meaning?lang=en",
+        json={"language": "en", "text": "Updated meaning"},
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = client.get("/isha/corpus?lang=en", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["version"] != corpus["version"]
+    assert response.json()["sutras"][0]["meanings"][0]["text"] == "Updated meaning"
+
+    response = client.get("/isha/corpus")
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()["sutras"][0]["meanings"]) == 2
@@ -215,3 +215,23 @@ def test_delete_interpretation(
         f"/isha/sutras/{sutra_data.get("number")}/interpretation?lang={interpretation_data.get("language")}&phil={interpretation_data.get("philosophy")}"
     )
     assert response.status_code == expected_status
+
+
+def test_update_interpretation_to_existing_philosophy(
+    authorized_admin, sutra_data, interpretation_data
+):
+    response = authorized_admin.post("/isha/sutras", json=sutra_data)
+    assert response.status_code == status.HTTP_201_CREATED
+
+    for philosophy in ("adv", "dva"):
+        response = authorized_admin.post(
+            f"/isha/sutras/{sutra_data.get("number")}/interpretation",
+            json={**interpretation_data, "philosophy": philosophy},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    response = authorized_admin.put(
+        f"/isha/sutras/{sutra_data.get("number")}/interpretation?lang=en&phil=dva",
+        json={**interpretation_data, "philosophy": "adv"},
+    )
+    assert response.status_code == status.HTTP_409_CONFLICT
@@ -210,3 +210,42 @@ def test_delete_meaning(
         f"/isha/sutras/{sutra_data.get("number")}/meaning?lang={meaning_data.get("language")}"
     )
     assert response.status_code == expected_status
+
+
+def test_get_meaning_not_found(client, authorized_admin, sutra_data):
+    # Missing sutra
+    response = client.get(f"/isha/sutras/{sutra_data.get("number")}/meaning?lang=en")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json()["detail"] == f"Sutra {sutra_data.get("number")} not found."
+
+    response = authorized_admin.post("/isha/sutras", json=sutra_data)
+    assert response.status_code == status.HTTP_201_CREATED
+
+    # Existing sutra without a meaning
+    response = client.get(f"/isha/sutras/{sutra_data.get("number")}/meaning?lang=en")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    assert response.json()["detail"] == "The requested resource was not found."
+
+
+def test_update_meaning_to_existing_language(authorized_admin, sutra_data, meaning_data):
+    response = authorized_admin.post("/isha/sutras", json=sutra_data)
+    assert response.status_code == status.HTTP_201_CREATED
+
+    for language in ("en", "kn"):
+        response = authorized_admin.post(
+            f"/isha/sutras/{sutra_data.get("number")}/meaning",
+            json={**meaning_data, "language": language},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    response = authorized_admin.put(
+        f"/isha/sutras/{sutra_data.get("number")}/meaning?lang=kn",
+        json={"language": "en", "text": "Moved meaning text"},
+    )
+    assert response.status_code == status.HTTP_409_CONFLICT
+
+    response = authorized_admin.get(
+        f"/isha/sutras/{sutra_data.get("number")}/meaning?lang=kn"
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["text"] == meaning_data["text"]
@@ -0,0 +1,119 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from app.isha import models
+from app.isha.migrations import (
+    add_missing_columns,
+    create_missing_indexes,
+    upgrade_search_index,
+)
+from app.isha.search import search_documents
+
+LEGACY_SCHEMA = [
+    "CREATE TABLE isha_sutras (id INTEGER PRIMARY KEY, number INTEGER UNIQUE, text VARCHAR(1000))",
+    "CREATE TABLE isha_meanings (id INTEGER PRIMARY KEY, language VARCHAR(50), text TEXT, sutra_id INTEGER)",
+    "CREATE TABLE isha_audio (id INTEGER PRIMARY KEY, file_path VARCHAR(500), mode VARCHAR(10), sutra_id INTEGER)",
+]
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(text(statement))
+
+    yield engine
+    engine.dispose()
+
+
+def test_add_missing_columns(legacy_engine):
+    with legacy_engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO isha_audio (file_path, mode, sutra_id) "
+                "VALUES ('static/isha/chant/sutra_1.mp3', 'chant', 1)"
+            )
+        )
+
+    assert add_missing_columns(legacy_engine) == ["isha_audio.sha256"]
+
+    with Session(legacy_engine) as db:
+        audio = db.query(models.Audio).one()
+        assert audio.file_path == "static/isha/chant/sutra_1.mp3"
+        assert audio.sha256 is None
+
+    # Running the upgrade again is a no-op
+    assert add_missing_columns(legacy_engine) == []
+
+
+def test_create_missing_indexes(legacy_engine):
+    created = create_missing_indexes(legacy_engine)
+    assert "ix_isha_meanings_sutra_id_language" in created
+
+    indexes = inspect(legacy_engine).get_indexes("isha_meanings")
+    index = next(
+        i for i in indexes if i["name"] == "ix_isha_meanings_sutra_id_language"
+    )
+    assert index["column_names"] == ["sutra_id", "language"]
+    assert index["unique"]
+
+    # Running the upgrade again is a no-op
+    assert create_missing_indexes(legacy_engine) == []
+
+
+def test_create_missing_indexes_skips_other_databases(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'current.db'}")
+    models.Base.metadata.create_all(bind=engine)
+
+    # MySQL's full-text index is never created on SQLite
+    for _ in range(2):
+        assert create_missing_indexes(engine) == []
+
+    indexes = inspect(engine).get_indexes("isha_search_documents")
+    assert "ix_isha_search_documents_terms" not in {index["name"] for index in indexes}
+
+    engine.dispose()
+
+
+def test_create_missing_indexes_skips_duplicates(legacy_engine):
+    with legacy_engine.begin() as conn:
+        for _ in range(2):
+            conn.execute(
+                text(
+                    "INSERT INTO isha_meanings (language, text, sutra_id) "
+                    "VALUES ('en', 'Duplicate meaning', 1)"
+                )
+            )
+
+    created = create_missing_indexes(legacy_engine)
+    assert "ix_isha_meanings_sutra_id_language" not in created
+
+
+def test_upgrade_search_index(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'isha.db'}")
+
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(text(statement))
+        conn.execute(text("INSERT INTO isha_sutras (number, text) VALUES (1, 'Sutra')"))
+        conn.execute(
+            text(
+                "INSERT INTO isha_meanings (language, text, sutra_id) "
+                "VALUES ('en', 'Meaning', 1)"
+            )
+        )
+
+    models.Base.metadata.create_all(bind=engine)
+
+    assert upgrade_search_index(engine)
+    with Session(engine) as db:
+        documents = search_documents(db, [("meaning",)])
+        assert [document.content_type for document, _ in documents] == ["meaning"]
+
+    # The index is only rebuilt when its version changes
+    assert not upgrade_search_index(engine)
+
+    engine.dispose()
@@ -0,0 +1,22 @@
+import pytest
+
+from app.isha.normalize import normalize_term
+
+
+@pytest.mark.parametrize(
+    "variant, canonical",
+    [
+        ("ई॒शा", "ईशा"),  # Vedic accents
+        ("इदं", "इदम्"),  # Final anusvara
+        ("सन्त", "संत"),  # Nasal before a consonant
+        ("भुञ्जीथा", "भुंजीथा"),
+        ("हँस", "हंस"),  # Candrabindu
+        ("क़लम", "कलम"),  # Nukta
+        ("क्‍ष", "क्ष"),  # ZWJ
+        ("रामः", "राम"),  # Visarga
+        ("ಇದಂ", "ಇದಮ್"),  # Kannada
+        ("Pūrṇamadaḥ", "purnamadah"),  # IAST
+    ],
+)
+def test_normalize_term(variant, canonical):
+    assert normalize_term(variant) == normalize_term(canonical)
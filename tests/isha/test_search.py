@@ -0,0 +1,467 @@
+import base64
+import json
+
+import pytest
+from fastapi import status
+
+from app.config import settings
+from app.isha import models
+from app.isha.cache import content_version
+from app.isha.routers.search import MAX_CURSOR_OFFSET, encode_cursor
+from app.isha.search import reindex_sutras, split_passages
+
+
+@pytest.fixture(params=[False, True], ids=["database", "memory"])
+def memory_index(request, monkeypatch):
+    monkeypatch.setattr(settings, "isha_search_memory_index", request.param)
+    return request.param
+
+
+def search(client, term, **params):
+    response = client.get(f"/isha/search/{term}", params=params)
+    assert response.status_code == status.HTTP_200_OK
+
+    return response.json()["results"]
+
+
+def test_search(client, authorized_admin, memory_index):
+    response = authorized_admin.post(
+        "/isha/sutras", json={"number": 1, "text": "ॐ पूर्णमदः पूर्णमिदं"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = authorized_admin.post(
+        "/isha/sutras/1/meaning",
+        json={"language": "en", "text": "That is whole, this is whole."},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = authorized_admin.post(
+        "/isha/sutras/1/interpretation",
+        json={"language": "en", "text": "The whole is Brahman.", "philosophy": "adv"},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    results = search(client, "पूर्ण")
+    assert len(results) == 1
+    assert results[0]["snippet"] == "ॐ पूर्णमदः पूर्णमिदं"
+    assert results[0]["highlights"] == [
+        {"start": 2, "end": 10},
+        {"start": 11, "end": 20},
+    ]
+    assert (results[0]["sutra_no"], results[0]["mode"], results[0]["lang"]) == (
+        1,
+        "chant",
+        None,
+    )
+
+    # The meaning mentions the term twice, so it ranks first
+    results = search(client, "WHOLE")
+    assert [result["mode"] for result in results] == [
+        "chant",
+        "interpretation - adv",
+    ]
+    assert results[0]["score"] > results[1]["score"] > 0
+    assert results[0]["lang"] == "en"
+
+    results = search(client, "whole brahman")
+    assert [result["mode"] for result in results] == ["interpretation - adv"]
+
+    assert search(client, "missing") == []
+
+
+def test_search_normalizes_variants(client, authorized_admin, memory_index):
+    response = authorized_admin.post(
+        "/isha/sutras", json={"number": 1, "text": "ॐ ई॒शा वा॒स्य॑मि॒दꣳ सर्वं॒ ।"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    for query in ["ईशा", "सर्वम्", "सर्वं"]:
+        [result] = search(client, query)
+        assert result["sutra_no"] == 1
+
+    [highlight] = search(client, "ईशा")[0]["highlights"]
+    assert highlight == {"start": 2, "end": 6}
+
+
+def test_search_across_scripts(client, authorized_admin, memory_index):
+    response = authorized_admin.post(
+        "/isha/sutras", json={"number": 1, "text": "ईशा वास्यमिदं सर्वं"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = authorized_admin.post(
+        "/isha/sutras/1/transliteration",
+        json={"language": "kn", "text": "ಈಶಾ ವಾಸ್ಯಮಿದಂ ಸರ್ವಂ"},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    for query in ["ईशा", "ಈಶಾ", "īśā", "isha", "vasyam"]:
+        results = search(client, query)
+        assert sorted(result["lang"] or "" for result in results) == ["", "kn"]
+
+
+def test_search_corrects_typos(client, authorized_admin, memory_index):
+    response = authorized_admin.post(
+        "/isha/sutras", json={"number": 1, "text": "Everything is Brahman"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    [result] = search(client, "brahmn")
+    assert result["highlights"] == [{"start": 14, "end": 21}]
+
+    assert search(client, "brahmn", similarity=0.9) == []
+
+    # A similarity of 0 would accept every indexed word as a correction
+    response = client.get("/isha/search/brahmn", params={"similarity": 0})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert len(search(client, "brahmn", similarity=0.01)) == 1
+
+
+def test_search_pagination(client, authorized_admin, memory_index):
+    for number in range(1, 6):
+        response = authorized_admin.post(
+            "/isha/sutras", json={"number": number, "text": f"Sutra {number}"}
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    sutra_nos = []
+    cursor = None
+
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        response = client.get("/isha/search/sutra", params=params)
+        assert response.status_code == status.HTTP_200_OK
+
+        page = response.json()
+        assert len(page["results"]) <= 2
+        sutra_nos += [result["sutra_no"] for result in page["results"]]
+
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(sutra_nos) == [1, 2, 3, 4, 5]
+
+    response = client.get("/isha/search/sutra", params={"cursor": "invalid"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.parametrize("payload", [b"-1", b"+2", b" 2", b"2\n", b"10" * 15])
+def test_search_invalid_cursor(client, payload):
+    cursor = base64.urlsafe_b64encode(payload).decode()
+
+    response = client.get("/isha/search/sutra", params={"cursor": cursor})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_search_deepest_cursor(client):
+    cursor = encode_cursor(MAX_CURSOR_OFFSET)
+
+    response = client.get("/isha/search/sutra", params={"cursor": cursor})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["results"] == []
+
+
+def test_search_ndjson(client, authorized_admin, memory_index):
+    for number in range(1, 6):
+        response = authorized_admin.post(
+            "/isha/sutras", json={"number": number, "text": f"Sutra {number}"}
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    headers = {"Accept": "application/x-ndjson"}
+
+    response = client.get("/isha/search/sutra", headers=headers, params={"limit": 2})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["vary"] == "Accept"
+    etag = response.headers["etag"]
+
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(result["sutra_no"] for result in results) == [1, 2, 3, 4, 5]
+    assert results == search(client, "sutra", limit=5)
+
+    # The JSON representation has another ETag
+    response = client.get("/isha/search/sutra", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["vary"] == "Accept"
+    assert response.headers["etag"] != etag
+
+    response = client.get(
+        "/isha/search/sutra", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["vary"] == "Accept"
+
+    cursor = client.get("/isha/search/sutra", params={"limit": 2}).json()["next_cursor"]
+    response = client.get(
+        "/isha/search/sutra", headers=headers, params={"cursor": cursor}
+    )
+    assert len(response.text.splitlines()) == 3
+
+    response = client.get("/isha/search/missing", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.text == ""
+
+
+def test_search_cache(client, authorized_admin):
+    response = authorized_admin.post(
+        "/isha/sutras", json={"number": 1, "text": "That is whole"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    def cache_stats():
+        return authorized_admin.get("/admin/cache").json()["isha_search"]
+
+    stats = cache_stats()
+    for term in ["whole", "WHOLE", "whole"]:
+        assert len(search(client, term)) == 1
+
+    new_stats = cache_stats()
+    assert new_stats["misses"] == stats["misses"] + 1
+    assert new_stats["hits"] == stats["hits"] + 2
+    assert new_stats["entries"] == 1
+
+    # Other filters or pages are other entries
+    search(client, "whole", type="meaning")
+    search(client, "whole", limit=1)
+    assert cache_stats()["entries"] == 3
+
+    # Writes invalidate every entry
+    response = authorized_admin.post(
+        "/isha/sutras", json={"number": 2, "text": "This is whole"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert cache_stats()["entries"] == 0
+
+    assert len(search(client, "whole")) == 2
+
+
+def test_search_snippet(client, authorized_admin):
+    text = " ".join(["filler"] * 30 + ["Brahman"] + ["filler"] * 30)
+
+    response = authorized_admin.post("/isha/sutras", json={"number": 1, "text": text})
+    assert response.status_code == status.HTTP_201_CREATED
+
+    [result] = search(client, "brahman")
+    assert len(result["snippet"]) <= 200
+    assert text[result["offset"] :].startswith(result["snippet"])
+
+    [highlight] = result["highlights"]
+    assert result["snippet"][highlight["start"] : highlight["end"]] == "Brahman"
+
+
+def test_search_follows_writes(client, authorized_admin, memory_index):
+    response = authorized_admin.post(
+        "/isha/sutras", json={"number": 1, "text": "Sutra"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    # Load the in-memory index, so later writes have to update it
+    assert len(search(client, "sutra")) == 1
+
+    response = authorized_admin.post(
+        "/isha/sutras/1/meaning", json={"language": "en", "text": "Old meaning"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = authorized_admin.put(
+        "/isha/sutras/1/meaning?lang=en", json={"language": "en", "text": "New meaning"}
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    assert search(client, "old") == []
+    assert len(search(client, "new")) == 1
+
+    response = authorized_admin.put(
+        "/isha/sutras/1", json={"number": 2, "text": "Sutra"}
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    assert [result["sutra_no"] for result in search(client, "new")] == [2]
+
+    response = authorized_admin.delete("/isha/sutras/2")
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    assert search(client, "new") == []
+
+
+def test_search_follows_writes_through_another_worker(
+    client, authorized_admin, session, memory_index, monkeypatch
+):
+    response = authorized_admin.post(
+        "/isha/sutras", json={"number": 1, "text": "Sutra"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    assert search(client, "worker") == []
+
+    # Another worker writes a meaning; this process's caches are not told
+    sutra = session.query(models.Sutra).one()
+    session.add(models.Meaning(sutra_id=sutra.id, language="en", text="Worker"))
+    reindex_sutras(session, 1)
+    session.commit()
+
+    # Until this process's copy of the content version expires
+    monkeypatch.setattr(content_version, "ttl", 0)
+
+    assert len(search(client, "worker")) == 1
+
+
+def test_search_bhashyam_passages(client, authorized_admin, memory_index):
+    response = authorized_admin.post(
+        "/isha/sutras", json={"number": 1, "text": "Sutra on the Self"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    text = "The Self is one. " * 40 + "Brahman alone is real. " + "It moves. " * 60
+    response = authorized_admin.post(
+        "/isha/sutras/1/bhashyam",
+        json={"language": "en", "philosophy": "adv", "text": text},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    [result] = search(client, "brahman")
+    assert result["content_type"] == "bhashyam"
+    assert result["mode"] == "bhashyam - adv"
+    assert result["offset"] > 0
+    assert text[result["offset"] :].startswith(result["snippet"])
+    assert len(result["snippet"]) <= 200
+
+    results = search(client, "self")
+    assert {result["content_type"] for result in results} == {"sutra", "bhashyam"}
+    assert [
+        result["content_type"] for result in search(client, "self", content="sutra")
+    ] == ["sutra"]
+    assert all(
+        result["content_type"] == "bhashyam"
+        for result in search(client, "self", content="bhashyam")
+    )
+
+    response = authorized_admin.delete("/isha/sutras/1/bhashyam?lang=en&phil=adv")
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    assert search(client, "brahman") == []
+
+
+def test_search_filters(client, authorized_admin, memory_index):
+    for number in range(1, 4):
+        response = authorized_admin.post(
+            "/isha/sutras", json={"number": number, "text": f"Brahman {number}"}
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+        for language in ["en", "hi"]:
+            response = authorized_admin.post(
+                f"/isha/sutras/{number}/interpretation",
+                json={"language": language, "text": "Brahman", "philosophy": "adv"},
+            )
+            assert response.status_code == status.HTTP_201_CREATED
+
+    response = authorized_admin.post(
+        "/isha/sutras/2/interpretation",
+        json={"language": "en", "text": "Brahman", "philosophy": "dva"},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    def found(**params):
+        return sorted(
+            (result["sutra_no"], result["content_type"], result["lang"], result["mode"])
+            for result in search(client, "brahman", **params)
+        )
+
+    assert len(found()) == 10
+    assert found(type="sutra") == [(n, "sutra", None, "chant") for n in [1, 2, 3]]
+    assert found(lang="hi", **{"from": 2}) == [
+        (2, "interpretation", "hi", "interpretation - adv"),
+        (3, "interpretation", "hi", "interpretation - adv"),
+    ]
+    assert found(phil="dva") == [(2, "interpretation", "en", "interpretation - dva")]
+    assert [result[0] for result in found(to=1)] == [1, 1, 1]
+    assert found(phil="vis") == []
+
+    response = client.get("/isha/search/brahman", params={"type": "unknown"})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+    assert found(content="sutra", type="sutra") == found(type="sutra")
+    response = client.get(
+        "/isha/search/brahman", params={"type": "sutra", "content": "meaning"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    # `type` is the filter's name, `content` is only kept for compatibility
+    openapi = client.get("/isha/openapi.json").json()
+    parameters = openapi["paths"]["/search/{term}"]["get"]["parameters"]
+    deprecated = {p["name"]: p.get("deprecated", False) for p in parameters}
+    assert deprecated["type"] is False
+    assert deprecated["content"] is True
+
+
+def test_search_suggest(client, authorized_admin):
+    response = authorized_admin.post(
+        "/isha/sutras", json={"number": 1, "text": "ईशा वास्यमिदं सर्वं यत्किञ्च"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = authorized_admin.post(
+        "/isha/sutras/1/meaning",
+        json={"language": "en", "text": "All this is for habitation by the Lord"},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    for prefix in ["ईश", "ish", "Is"]:
+        response = client.get("/isha/search/suggest", params={"prefix": prefix})
+        assert response.status_code == status.HTTP_200_OK
+        words = [suggestion["word"] for suggestion in response.json()["suggestions"]]
+        assert "ईशा" in words
+
+    response = client.get("/isha/search/suggest", params={"prefix": "l", "k": 1})
+    assert response.json() == {"suggestions": [{"word": "Lord", "frequency": 1}]}
+
+    # Devanagari prefixes do not complete to English words sharing their key
+    response = client.get("/isha/search/suggest", params={"prefix": "ई"})
+    words = [suggestion["word"] for suggestion in response.json()["suggestions"]]
+    assert "ईशा" in words
+    assert "is" not in words
+
+    # Nor to Devanagari words whose key only starts like theirs
+    response = authorized_admin.post(
+        "/isha/sutras", json={"number": 2, "text": "पुरुष पुरुष पूर्णम् इस इति"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.get("/isha/search/suggest", params={"prefix": "पू"})
+    assert response.json() == {"suggestions": [{"word": "पूर्णम्", "frequency": 1}]}
+
+    response = client.get("/isha/search/suggest", params={"prefix": "ई"})
+    words = [suggestion["word"] for suggestion in response.json()["suggestions"]]
+    assert words == ["ईशा"]
+
+    # Changed content is completed without the rest
+    response = authorized_admin.put(
+        "/isha/sutras/2", json={"number": 2, "text": "पूर्णमदः"}
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = client.get("/isha/search/suggest", params={"prefix": "पू"})
+    assert response.json() == {"suggestions": [{"word": "पूर्णमदः", "frequency": 1}]}
+
+    response = client.get("/isha/search/suggest", params={"prefix": "pur"})
+    assert response.json() == {"suggestions": [{"word": "पूर्णमदः", "frequency": 1}]}
+
+    response = client.get("/isha/search/suggest", params={"prefix": "?"})
+    assert response.json() == {"suggestions": []}
+
+
+def test_split_passages():
+    text = "First sentence। " * 50 + "\n\nLast paragraph"
+    passages = split_passages(text)
+
+    assert len(passages) > 1
+    for offset, passage in passages:
+        assert text[offset:].startswith(passage)
+        assert passage.strip()
+    assert passages[-1][1].endswith("Last paragraph")
+    assert all(len(passage) < 600 for _, passage in passages)
+    assert split_passages("Short text.") == [(0, "Short text.")]
@@ -0,0 +1,28 @@
+from types import SimpleNamespace
+
+import orjson
+
+from app.isha import schemas
+from app.isha.serializers import dump_json
+
+
+def test_dump_json_matches_pydantic():
+    meaning = SimpleNamespace(id=1, language="en", text="मन्त्र", sutra_id=1)
+    sutra = {
+        "id": 1,
+        "number": 1,
+        "text": "ईशा वास्यम्",
+        "transliteration": None,
+        "meaning": meaning,
+        "interpretation": None,
+        "bhashyam": None,
+        "audio": SimpleNamespace(
+            file_path="static/isha/chant/sutra_1.mp3", sha256=None
+        ),
+    }
+
+    expected = schemas.SutraFullOut.model_validate(sutra, from_attributes=True)
+
+    assert orjson.loads(dump_json(schemas.SutraFullOut, sutra)) == expected.model_dump(
+        mode="json"
+    )
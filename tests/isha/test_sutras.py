@@ -1,5 +1,11 @@
 import pytest
-from fastapi import status
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+
+from app.isha import models
+from app.isha.cache import content_version
+from app.isha.routers.utils import conflict_on_duplicate
+from app.isha.search import reindex_sutras
 
 
 @pytest.fixture
@@ -168,3 +174,185 @@ def test_delete_sutra(
 
     response = test_client.delete(f"/isha/sutras/{sutra_data.get("number")}")
     assert response.status_code == expected_status
+
+
+def test_update_sutra_number_refreshes_lookups(client, authorized_admin, sutra_data):
+    response = authorized_admin.post("/isha/sutras", json=sutra_data)
+    assert response.status_code == status.HTTP_201_CREATED
+
+    # Populate the in-process sutra map
+    response = client.get(f"/isha/sutras/{sutra_data.get("number")}")
+    assert response.status_code == status.HTTP_200_OK
+
+    updated_sutra = {"number": 11, "text": "Renumbered sutra"}
+    response = authorized_admin.put(
+        f"/isha/sutras/{sutra_data.get("number")}", json=updated_sutra
+    )
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = client.get(f"/isha/sutras/{sutra_data.get("number")}")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    response = client.get(f"/isha/sutras/{updated_sutra.get("number")}")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"id": 1, **updated_sutra}
+
+
+def test_get_sutra_full(client, authorized_admin, sutra_data):
+    response = authorized_admin.post("/isha/sutras", json=sutra_data)
+    assert response.status_code == status.HTTP_201_CREATED
+
+    meaning_data = {"language": "en", "text": "Test meaning text"}
+    response = authorized_admin.post(
+        f"/isha/sutras/{sutra_data.get("number")}/meaning", json=meaning_data
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = authorized_admin.post(
+        f"/isha/sutras/{sutra_data.get("number")}/meaning",
+        json={"language": "kn", "text": "Test Kannada meaning text"},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.get(f"/isha/sutras/{sutra_data.get("number")}/full?lang=en")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {
+        "id": 1,
+        **sutra_data,
+        "transliteration": None,
+        "meaning": {"id": 1, **meaning_data},
+        "interpretation": None,
+        "bhashyam": None,
+        "audio": None,
+    }
+
+    response = client.get("/isha/sutras/99/full")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_get_sutra_not_modified(client, authorized_admin, sutra_data):
+    response = authorized_admin.post("/isha/sutras", json=sutra_data)
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.get(f"/isha/sutras/{sutra_data.get("number")}")
+    assert response.status_code == status.HTTP_200_OK
+    etag = response.headers["etag"]
+    assert response.headers["last-modified"]
+
+    response = client.get(
+        f"/isha/sutras/{sutra_data.get("number")}", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+
+    # Writes to the sutra or its children change its ETag
+    response = authorized_admin.post(
+        f"/isha/sutras/{sutra_data.get("number")}/meaning",
+        json={"language": "en", "text": "Test meaning text"},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.get(
+        f"/isha/sutras/{sutra_data.get("number")}", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"] != etag
+
+    response = client.get(
+        f"/isha/sutras/{sutra_data.get("number")}", headers={"If-None-Match": "*"}
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    # Nothing matches a sutra that does not exist
+    for path in ["/isha/sutras/999", "/isha/sutras/999/meaning?lang=en"]:
+        for if_none_match in ["*", '"0"']:
+            response = client.get(path, headers={"If-None-Match": if_none_match})
+            assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_write_through_another_worker_changes_etag(
+    client, authorized_admin, session, sutra_data, monkeypatch
+):
+    response = authorized_admin.post("/isha/sutras", json=sutra_data)
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.get(f"/isha/sutras/{sutra_data.get("number")}")
+    assert response.status_code == status.HTTP_200_OK
+    etag = response.headers["etag"]
+
+    # Another worker writes the sutra: the shared version is bumped, but the
+    # caches of this process are not told
+    sutra = session.query(models.Sutra).one()
+    sutra.text = "Text written by another worker"
+    reindex_sutras(session, sutra.number)
+    session.commit()
+
+    # Until this process's copy of the version expires
+    monkeypatch.setattr(content_version, "ttl", 0)
+
+    response = client.get(
+        f"/isha/sutras/{sutra_data.get("number")}", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"] != etag
+    assert response.json()["text"] == "Text written by another worker"
+
+
+def test_get_related_sutras(client, authorized_admin):
+    texts = {
+        1: "The Self is everywhere",
+        2: "The Self is the Lord",
+        3: "Knowledge and ignorance",
+    }
+    for number, text in texts.items():
+        response = authorized_admin.post(
+            "/isha/sutras", json={"number": number, "text": text}
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.get("/isha/sutras/1/related")
+    assert response.status_code == status.HTTP_200_OK
+    [related] = response.json()
+    assert related["sutra_no"] == 2
+    assert 0 < related["score"] < 1
+
+    # Writes to meanings are taken into account
+    response = authorized_admin.post(
+        "/isha/sutras/3/meaning",
+        json={"language": "en", "text": "The Self is beyond knowledge"},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.get("/isha/sutras/1/related", params={"k": 1})
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.json()) == 1
+
+    response = client.get("/isha/sutras/1/related")
+    assert sorted(related["sutra_no"] for related in response.json()) == [2, 3]
+
+    response = authorized_admin.delete("/isha/sutras/2")
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = client.get("/isha/sutras/1/related")
+    assert [related["sutra_no"] for related in response.json()] == [3]
+
+    response = client.get("/isha/sutras/2/related")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_conflict_on_duplicate(session):
+    session.add(models.Sutra(number=1, text="Sutra"))
+    session.commit()
+
+    with pytest.raises(HTTPException) as excinfo:
+        with conflict_on_duplicate(session, "Sutra 1 already exists!"):
+            session.add(models.Sutra(number=1, text="Duplicate"))
+            session.commit()
+    assert excinfo.value.status_code == status.HTTP_409_CONFLICT
+
+    # Only unique index violations are conflicts
+    with pytest.raises(IntegrityError):
+        with conflict_on_duplicate(session, "Sutra 2 already exists!"):
+            session.add(models.Sutra(number=2, text=None))
+            session.commit()
@@ -0,0 +1,30 @@
+import pytest
+
+from app.isha.transliterate import search_key, to_slp1
+
+
+@pytest.mark.parametrize(
+    "text, slp1",
+    [
+        ("ईशावास्यम्", "ISAvAsyam"),
+        ("पूर्णमदः", "pUrRamadaH"),
+        ("ಪೂರ್ಣಮದಃ", "pUrRamadaH"),
+        ("పూర్ణమదః", "pUrRamadaH"),
+        ("pūrṇamadaḥ", "pUrRamadaH"),
+        ("भुञ्जीथा", "BuYjITA"),
+        ("ई॒शा", "ISA"),
+    ],
+)
+def test_to_slp1(text, slp1):
+    assert to_slp1(text) == slp1
+
+
+@pytest.mark.parametrize(
+    "variants",
+    [
+        ["ईशावास्यम्", "ಈಶಾವಾಸ್ಯಮ್", "īśāvāsyam", "ishavasyam"],
+        ["शान्तिः", "शांतिः", "śāntiḥ"],
+    ],
+)
+def test_search_key(variants):
+    assert len({search_key(variant) for variant in variants}) == 1
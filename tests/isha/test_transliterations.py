@@ -210,3 +210,23 @@ def test_delete_transliteration(
         f"/isha/sutras/{sutra_data.get("number")}/transliteration?lang={transliteration_data.get("language")}"
     )
     assert response.status_code == expected_status
+
+
+def test_update_transliteration_to_existing_language(
+    authorized_admin, sutra_data, transliteration_data
+):
+    response = authorized_admin.post("/isha/sutras", json=sutra_data)
+    assert response.status_code == status.HTTP_201_CREATED
+
+    for language in ("en", "kn"):
+        response = authorized_admin.post(
+            f"/isha/sutras/{sutra_data.get("number")}/transliteration",
+            json={**transliteration_data, "language": language},
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+
+    response = authorized_admin.put(
+        f"/isha/sutras/{sutra_data.get("number")}/transliteration?lang=kn",
+        json={"language": "en", "text": "Moved transliteration text"},
+    )
+    assert response.status_code == status.HTTP_409_CONFLICT
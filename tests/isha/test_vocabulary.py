@@ -0,0 +1,43 @@
+from collections import Counter
+
+from app.isha.vocabulary import Completions, Vocabulary, edit_distance
+
+
+def test_edit_distance():
+    assert edit_distance("brahman", "brahman") == 0
+    assert edit_distance("brahman", "brahmn") == 1
+    assert edit_distance("purnam", "poornam") == 2
+
+
+def test_similar():
+    vocabulary = Vocabulary(
+        Counter({"brahman": 3, "brahmana": 1, "brahma": 2, "atman": 5})
+    )
+
+    assert vocabulary.has_prefix("brah")
+    assert not vocabulary.has_prefix("brahmn")
+
+    assert vocabulary.similar("brahmn", 0.3, 2) == ["brahma", "brahman"]
+    assert vocabulary.similar("brahmn", 0.9, 2) == []
+
+
+def test_complete():
+    completions = Completions(
+        {
+            "ईशा": Counter({"ईशा": 3, "ई॒शा": 1}),
+            "ईश": Counter({"ईश": 2}),
+            "isvara": Counter({"Isvara": 1}),
+        },
+        {"ईशा": {"ईशा", "isha"}, "ईश": {"ईश", "isha"}, "isvara": {"isvara"}},
+    )
+
+    assert completions.complete(("ईश",), 5) == [("ईशा", 4), ("ईश", 2)]
+    assert completions.complete(("is",), 5) == [("ईशा", 4), ("ईश", 2), ("Isvara", 1)]
+    assert completions.complete(("is",), 1) == [("ईशा", 4)]
+    assert completions.complete(("x",), 5) == []
+
+    # A Devanagari prefix only completes to Devanagari words
+    assert completions.complete(("ईश", "is"), 5, "devanagari") == [
+        ("ईशा", 4),
+        ("ईश", 2),
+    ]
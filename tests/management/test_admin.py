@@ -0,0 +1,76 @@
+import pytest
+from fastapi import status
+from sqlalchemy import create_engine, exc
+
+from app.database import StatsQueuePool
+
+
+@pytest.mark.parametrize(
+    "client_type, expected_status",
+    [
+        ("client", status.HTTP_401_UNAUTHORIZED),
+        ("authorized_client", status.HTTP_403_FORBIDDEN),
+        ("authorized_admin", status.HTTP_200_OK),
+    ],
+)
+def test_get_cache_stats(
+    client_type, expected_status, client, authorized_client, authorized_admin
+):
+    clients = {
+        "client": client,
+        "authorized_client": authorized_client,
+        "authorized_admin": authorized_admin,
+    }
+    test_client = clients[client_type]
+
+    response = test_client.get("/admin/cache")
+    assert response.status_code == expected_status
+
+
+def test_cache_stats_count_hits(client, authorized_admin):
+    response = authorized_admin.post(
+        "/isha/sutras", json={"number": 1, "text": "Sutra"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    stats = authorized_admin.get("/admin/cache").json()["isha_responses"]
+
+    for _ in range(3):
+        response = client.get("/isha/sutras/1")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == {"id": 1, "number": 1, "text": "Sutra"}
+
+    new_stats = authorized_admin.get("/admin/cache").json()["isha_responses"]
+    assert new_stats["misses"] == stats["misses"] + 1
+    assert new_stats["hits"] == stats["hits"] + 2
+    assert new_stats["entries"] == 1
+
+
+def test_get_pool_stats(authorized_admin):
+    response = authorized_admin.get("/admin/pool")
+    assert response.status_code == status.HTTP_200_OK
+
+    stats = response.json()["sync"]
+    assert {"size", "checked_out", "overflow", "waits", "timeouts"} <= set(stats)
+
+
+def test_pool_stats_count_timeouts():
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StatsQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+    connection = engine.connect()
+
+    with pytest.raises(exc.TimeoutError):
+        engine.connect()
+
+    stats = engine.pool.stats()
+    assert stats["checked_out"] == 1
+    assert stats["waits"] == 1
+    assert stats["timeouts"] == 1
+
+    connection.close()
+    engine.dispose()